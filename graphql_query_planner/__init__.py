@@ -1,41 +1,557 @@
-from typing import Optional
-
-from graphql import GraphQLSchema
-
-from graphql_query_planner.build_query_plan import (
-    BuildQueryPlanOptions,
-    OperationContext,
-    build_query_plan,
-)
-from graphql_query_planner.query_plan import QueryPlan
-
-
-class QueryPlanner:
-    # There isn't much in this class yet, and I didn't want to make too many
-    # changes at once, but since we were already storing a pointer to a
-    # Rust query planner instance in the gateway, I think it makes sense to retain
-    # that structure. I suspect having a class instead of a stand-alone function
-    # will come in handy to encapsulate schema-derived data that is used during
-    # planning but isn't operation specific. The next step is likely to be to
-    # convert `buildQueryPlan` into a method.
-
-    schema: GraphQLSchema
-
-    def __init__(self, schema: GraphQLSchema):
-        self.schema = schema
-
-    def build_query_plan(
-        self,
-        operation_context: OperationContext,
-        options: Optional[BuildQueryPlanOptions],
-    ) -> QueryPlan:
-        # TODO(#632): We should change the API to avoid confusion, because
-        # taking an operationContext with a schema on it isn't consistent
-        # with a QueryPlanner instance being bound to a single schema.
-
-        operation_context.schema = self.schema
-
-        if options is not None:
-            return build_query_plan(operation_context, options)
-        else:
-            return build_query_plan(operation_context)
+import pickle
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from hashlib import sha256
+from time import monotonic
+from typing import Callable, Iterable, Optional, Union, cast
+
+from graphql import (
+    ArgumentNode,
+    DocumentNode,
+    FragmentDefinitionNode,
+    GraphQLError,
+    GraphQLSchema,
+    NameNode,
+    OperationDefinitionNode,
+    TypeInfo,
+    TypeInfoVisitor,
+    ValueNode,
+    VariableDefinitionNode,
+    VariableNode,
+    Visitor,
+    parse,
+    parse_type,
+    print_ast,
+    print_schema,
+    strip_ignored_characters,
+    validate,
+    visit,
+)
+
+from graphql_query_planner.build_query_plan import (
+    BuildQueryPlanOptions,
+    OperationContext,
+    _build_query_plan_uncached,
+    _printed_fragment_bodies,
+)
+from graphql_query_planner.composed_schema.metadata import (
+    federation_index_for_schema,
+    get_federation_metadata_for_schema,
+)
+from graphql_query_planner.query_plan import FetchNode, QueryPlan
+from graphql_query_planner.utilities.graphql_ import intern_schema
+from graphql_query_planner.utilities.lru_cache import LRUCache
+
+
+def _hash_internal(document: str) -> int:
+    # Internal cache keys are not adversarial, so the built-in C-level string
+    # hash (already computed lazily and cached on the str object) beats a
+    # cryptographic digest by an order of magnitude. The int result is also
+    # the key type CPython dicts look up fastest. Client-facing APQ document
+    # IDs keep using sha256 (see QueryPlanner._hash_document).
+    return hash(document)
+
+
+# Passing no options must hit the same cache entries as passing defaults.
+_NO_OPTIONS_HASH = hash(BuildQueryPlanOptions())
+
+
+def plan_size_in_bytes(plan: '_ShardEntry') -> int:
+    """Approximates a plan's memory footprint by its pickled size.
+
+    Matches Apollo Gateway's `sizeCalculation`: plans vary in size by orders
+    of magnitude, so bounding the cache in bytes rather than entries keeps a
+    few huge plans from exhausting gateway memory.
+    """
+    return len(pickle.dumps(plan, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class _LiteralToVariableVisitor(Visitor):
+    """Replaces literal argument values with synthetic variables.
+
+    Synthesizes a variable definition per extracted literal (typed from the
+    schema via TypeInfo), so the rewritten operation is plannable as-is and
+    fetch operations carry the right variable usages. The extracted values
+    are collected in `mapping` for the executor to supply at request time.
+    """
+
+    mapping: dict[str, ValueNode]
+    variable_definitions: list[VariableDefinitionNode]
+
+    def __init__(self, type_info: TypeInfo, reserved_names: frozenset[str]) -> None:
+        super().__init__()
+        self._type_info = type_info
+        self._reserved_names = reserved_names
+        self._counter = 0
+        self.mapping = {}
+        self.variable_definitions = []
+
+    def _next_name(self) -> str:
+        # Skip names the operation already declares: a valid query may use
+        # `$_v0` itself, and a clashing definition would bind conflictingly.
+        name = f'_v{self._counter}'
+        self._counter += 1
+        while name in self._reserved_names:
+            name = f'_v{self._counter}'
+            self._counter += 1
+        return name
+
+    def enter_argument(self, node: ArgumentNode, *_) -> ArgumentNode:
+        value = node.value
+        if isinstance(value, VariableNode):
+            return node
+
+        argument = self._type_info.get_argument()
+        if argument is None:
+            # Unknown argument (validation will reject it); leave the
+            # literal alone rather than invent an untyped variable.
+            return node
+
+        name = self._next_name()
+        self.mapping[name] = value
+        self.variable_definitions.append(
+            VariableDefinitionNode(
+                variable=VariableNode(name=NameNode(value=name)),
+                type=parse_type(str(argument.type)),
+            )
+        )
+        return ArgumentNode(name=node.name, value=VariableNode(name=NameNode(value=name)))
+
+
+class _TtlEntry:
+    """A cached plan plus its expiry, used when a plan TTL is configured.
+
+    `expires_at` is mutable on purpose: entries refresh on access, so the
+    TTL is relative to the last hit rather than the insertion.
+    """
+
+    __slots__ = ('plan', 'expires_at')
+
+    plan: QueryPlan
+    expires_at: float
+
+    def __init__(self, plan: QueryPlan, expires_at: float) -> None:
+        self.plan = plan
+        self.expires_at = expires_at
+
+
+# Shards hold bare plans when no TTL is set (the common case, spared the
+# wrapper allocation) and _TtlEntry otherwise; `_plan_ttl` discriminates.
+_ShardEntry = Union[QueryPlan, _TtlEntry]
+
+
+class PersistedQueryNotFoundError(GraphQLError):
+    """Raised when a plan is requested by hash for an unregistered document.
+
+    Mirrors Apollo's PERSISTED_QUERY_NOT_FOUND: the caller should fall back
+    to sending (and registering) the full query string.
+    """
+
+    def __init__(self, sha256_hex: str):
+        super().__init__(f'PersistedQueryNotFound: {sha256_hex}')
+
+
+def build_operation_context(
+    schema: GraphQLSchema, document: DocumentNode, operation_name: Optional[str] = None
+) -> OperationContext:
+    operation: Optional[OperationDefinitionNode] = None
+    fragments: dict[str, FragmentDefinitionNode] = {}
+
+    for definition in document.definitions:
+        if isinstance(definition, OperationDefinitionNode):
+            if operation_name is None:
+                if operation is not None:
+                    raise GraphQLError(
+                        'Must provide operation name if query contains multiple operations.'
+                    )
+                operation = definition
+            elif definition.name is not None and definition.name.value == operation_name:
+                operation = definition
+        elif isinstance(definition, FragmentDefinitionNode):
+            fragments[definition.name.value] = definition
+
+    if operation is None:
+        if operation_name is not None:
+            raise GraphQLError(f'Unknown operation named "{operation_name}".')
+        raise GraphQLError('Must provide an operation.')
+
+    return OperationContext(schema=schema, operation=operation, fragments=fragments)
+
+
+class QueryPlanner:
+    # There isn't much in this class yet, and I didn't want to make too many
+    # changes at once, but since we were already storing a pointer to a
+    # Rust query planner instance in the gateway, I think it makes sense to retain
+    # that structure. I suspect having a class instead of a stand-alone function
+    # will come in handy to encapsulate schema-derived data that is used during
+    # planning but isn't operation specific. The next step is likely to be to
+    # convert `buildQueryPlan` into a method.
+
+    # Planners are long-lived but accessed on every request; __slots__ drops
+    # the per-instance __dict__ and makes attribute reads C-level slot loads.
+    __slots__ = (
+        'schema',
+        '_plan_cache_shards',
+        '_plan_cache_locks',
+        '_plans_in_progress',
+        '_single_subgraph',
+        '_plan_fn',
+        '_doc_store',
+        '_doc_store_lock',
+        '_ast_cache',
+        '_ast_cache_lock',
+        '_schema_key',
+        '_plan_ttl',
+    )
+
+    schema: GraphQLSchema
+
+    # The lone subgraph name when the supergraph is backed by exactly one
+    # subgraph, else None.
+    _single_subgraph: Optional[str]
+
+    # Query plans are expensive to build but deterministic for a given
+    # (operation, options) pair, so repeated operations are served from an
+    # LRU cache instead of being re-planned. The cache is sharded 16 ways by
+    # key hash so that concurrent planners only contend on
+    # keys in the same stripe, not on one global lock.
+    _plan_cache_shards: list[LRUCache[str, _ShardEntry]]
+    _plan_cache_locks: list[threading.Lock]
+    # Per-shard map of keys currently being planned, so a cold miss hit by N
+    # threads triggers one plan instead of N (thundering herd).
+    _plans_in_progress: 'list[dict[str, Future[QueryPlan]]]'
+
+    # Digest of the printed schema, part of every cache key: plans must never
+    # be reused across schemas (or serialized caches shared between gateways
+    # running different schema versions).
+    _schema_key: str
+    # When set, cached plans expire `_plan_ttl` seconds after their last hit;
+    # hot plans stay resident while stale ones age out of churny caches.
+    _plan_ttl: Optional[float]
+
+    _CACHE_STRIPES = 16
+
+    # Registered persisted-query documents, keyed by their sha256 hex digest
+    # and bounded in bytes so a flood of registrations cannot grow unchecked.
+    _doc_store: LRUCache[str, str]
+
+    _DOC_STORE_MAX_BYTES = 4 * 2**20
+
+    # Parsed (and validated) documents keyed by the query-string hash, so hot
+    # requests that arrive as strings skip the lexer, parser, and validator
+    # entirely. Per planner rather than module-global: entries are validated
+    # against this planner's schema, so they must not be served to a planner
+    # holding a different one. Bounded so ad-hoc query traffic cannot grow
+    # the cache without limit.
+    _ast_cache: LRUCache[int, DocumentNode]
+
+    _AST_CACHE_MAX_SIZE = 1024
+
+    def __init__(
+        self,
+        schema: GraphQLSchema,
+        plan_cache_size: int = 512,
+        plan_cache_max_bytes: Optional[int] = None,
+        plan_cache_ttl: Optional[float] = None,
+    ):
+        self.schema = schema
+        self._schema_key = sha256(print_schema(schema).encode('utf-8')).hexdigest()[:16]
+        self._plan_ttl = plan_cache_ttl
+        if plan_cache_max_bytes is not None:
+            shard_size = max(1, plan_cache_max_bytes // self._CACHE_STRIPES)
+            self._plan_cache_shards = [
+                LRUCache(shard_size, getsizeof=plan_size_in_bytes)
+                for _ in range(self._CACHE_STRIPES)
+            ]
+        else:
+            shard_size = max(1, plan_cache_size // self._CACHE_STRIPES)
+            self._plan_cache_shards = [LRUCache(shard_size) for _ in range(self._CACHE_STRIPES)]
+        self._plan_cache_locks = [threading.Lock() for _ in range(self._CACHE_STRIPES)]
+        self._plans_in_progress = [{} for _ in range(self._CACHE_STRIPES)]
+
+        schema_metadata = get_federation_metadata_for_schema(schema)
+        graph_names = list(schema_metadata.graphs) if schema_metadata is not None else []
+        self._single_subgraph = graph_names[0] if len(graph_names) == 1 else None
+
+        # Derive the planning index eagerly so the first request doesn't pay
+        # the O(|schema|) walk.
+        federation_index_for_schema(schema)
+        intern_schema(schema)
+
+        self._plan_fn = self._specialize_plan_fn()
+
+        self._doc_store = LRUCache(self._DOC_STORE_MAX_BYTES, getsizeof=len)
+        self._doc_store_lock = threading.Lock()
+
+        self._ast_cache = LRUCache(self._AST_CACHE_MAX_SIZE)
+        self._ast_cache_lock = threading.Lock()
+
+    def build_query_plan(
+        self,
+        operation_context: OperationContext,
+        options: Optional[BuildQueryPlanOptions],
+    ) -> QueryPlan:
+        # TODO(#632): We should change the API to avoid confusion, because
+        # taking an operationContext with a schema on it isn't consistent
+        # with a QueryPlanner instance being bound to a single schema.
+
+        operation_context.schema = self.schema
+
+        key = self._plan_cache_key(operation_context, options)
+        # The key now starts with the per-planner schema digest, so stripe
+        # selection hashes the whole key rather than reading its first char.
+        stripe = hash(key) % self._CACHE_STRIPES
+        lock = self._plan_cache_locks[stripe]
+        shard = self._plan_cache_shards[stripe]
+        in_progress = self._plans_in_progress[stripe]
+        ttl = self._plan_ttl
+
+        with lock:
+            entry = shard.get(key)
+            if entry is not None:
+                if ttl is None:
+                    return cast(QueryPlan, entry)
+                ttl_entry = cast(_TtlEntry, entry)
+                if monotonic() < ttl_entry.expires_at:
+                    # Refresh on access: entries expire relative to their
+                    # last hit, not their insertion.
+                    ttl_entry.expires_at = monotonic() + ttl
+                    return ttl_entry.plan
+                # Expired — fall through and re-plan; the fresh entry
+                # overwrites this one below.
+
+            future = in_progress.get(key)
+            if future is None:
+                future = Future()
+                in_progress[key] = future
+                is_owner = True
+            else:
+                is_owner = False
+
+        if not is_owner:
+            return future.result()
+
+        try:
+            plan = self._plan_fn(operation_context, options)
+        except BaseException as error:
+            with lock:
+                del in_progress[key]
+            future.set_exception(error)
+            raise
+
+        with lock:
+            shard.set(key, plan if ttl is None else _TtlEntry(plan, monotonic() + ttl))
+            del in_progress[key]
+        future.set_result(plan)
+
+        return plan
+
+    def _specialize_plan_fn(
+        self,
+    ) -> 'Callable[[OperationContext, Optional[BuildQueryPlanOptions]], QueryPlan]':
+        """Builds the cache-miss planning function specialized to this schema.
+
+        Schema-derived facts are baked into the closure when the planner is
+        constructed, so generic branches disappear from the per-request path
+        entirely — e.g. multi-subgraph schemas never test the
+        single-subgraph bypass.
+        """
+        single_subgraph_plan = self._single_subgraph_plan if self._single_subgraph else None
+
+        # Straight to the planning pipeline: the planner's sharded cache
+        # already wraps this call, and layering the module-level cache
+        # underneath would keep evicted or expired plans alive past the
+        # planner's byte and TTL bounds.
+        if single_subgraph_plan is None:
+
+            def plan_fn(
+                operation_context: OperationContext, options: Optional[BuildQueryPlanOptions]
+            ) -> QueryPlan:
+                if options is not None:
+                    return _build_query_plan_uncached(operation_context, options)
+                return _build_query_plan_uncached(operation_context)
+
+        else:
+
+            def plan_fn(
+                operation_context: OperationContext, options: Optional[BuildQueryPlanOptions]
+            ) -> QueryPlan:
+                if options is not None:
+                    if options.bypass_planner_for_single_subgraph:
+                        return single_subgraph_plan(operation_context)
+                    return _build_query_plan_uncached(operation_context, options)
+                return _build_query_plan_uncached(operation_context)
+
+        return plan_fn
+
+    def _single_subgraph_plan(self, operation_context: OperationContext) -> QueryPlan:
+        # With one subgraph there is nothing to split: forward the whole
+        # operation (plus its fragments) as a single root fetch.
+        document = DocumentNode(
+            definitions=[operation_context.operation, *operation_context.fragments.values()]
+        )
+        operation = operation_context.operation
+        return QueryPlan(
+            node=FetchNode(
+                service_name=self._single_subgraph,  # type: ignore[arg-type]
+                variable_usages=tuple(
+                    definition.variable.name.value
+                    for definition in operation.variable_definitions or []
+                ),
+                requires=None,
+                operation=strip_ignored_characters(print_ast(document)),
+            )
+        )
+
+    def _plan_cache_key(
+        self,
+        operation_context: OperationContext,
+        options: Optional[BuildQueryPlanOptions],
+    ) -> str:
+        operation = operation_context.operation
+        # Fragment bodies are part of the hashed text: the printed operation
+        # only mentions spread names, and same-named fragments can select
+        # different fields across documents.
+        fragment_bodies = _printed_fragment_bodies(operation_context.fragments.values())
+        digest = QueryPlanner._hash_document(
+            '\n'.join((print_ast(operation), *fragment_bodies))
+        ).hex()
+        operation_name = operation.name.value if operation.name is not None else ''
+        options_hash = hash(options) if options is not None else _NO_OPTIONS_HASH
+        return f'{self._schema_key}:{digest}:{operation_name}:{options_hash}'
+
+    def warm_up(
+        self,
+        operations: Iterable[OperationContext],
+        options: Optional[BuildQueryPlanOptions] = None,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        """Precomputes plans for the given operations, e.g. on schema reload.
+
+        Planning happens off the request critical path (typically fed from a
+        persisted-query list before traffic switches to a new schema), so the
+        p99 stays flat when a schema change invalidates the plan cache.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for operation_context in operations:
+                executor.submit(self.build_query_plan, operation_context, options)
+
+    def parse_and_plan(
+        self,
+        query: str,
+        operation_name: Optional[str] = None,
+        options: Optional[BuildQueryPlanOptions] = None,
+    ) -> QueryPlan:
+        """Plans a query given as a string, caching the parsed document.
+
+        Chains the AST cache and the plan cache, so a hot request pays only
+        two dict lookups.
+        """
+        key = _hash_internal(query)
+
+        with self._ast_cache_lock:
+            document = self._ast_cache.get(key)
+
+        if document is None:
+            document = parse(query)
+            errors = validate(self.schema, document)
+            if errors:
+                raise errors[0]
+            with self._ast_cache_lock:
+                self._ast_cache.set(key, document)
+
+        operation_context = build_operation_context(self.schema, document, operation_name)
+        return self.build_query_plan(operation_context, options)
+
+    def register(self, sha256_hex: str, query: str) -> None:
+        """Registers a persisted query document under its sha256 hex digest.
+
+        The digest is verified against the document, as a poisoned entry
+        would otherwise serve the wrong plan for every later request.
+        """
+        if sha256(query.encode('utf-8')).hexdigest() != sha256_hex:
+            raise GraphQLError(f'Provided sha256 hash does not match query: {sha256_hex}')
+        with self._doc_store_lock:
+            self._doc_store.set(sha256_hex, query)
+
+    def build_query_plan_by_hash(
+        self,
+        sha256_hex: str,
+        operation_name: Optional[str] = None,
+        options: Optional[BuildQueryPlanOptions] = None,
+    ) -> QueryPlan:
+        """Plans a previously registered query identified only by its hash.
+
+        Clients send the 32-byte digest instead of the query text; repeated
+        requests then hit the AST and plan caches without transporting or
+        parsing the document again. Unknown hashes raise
+        PersistedQueryNotFoundError, signalling the client to retry with the
+        full query via `register`.
+        """
+        with self._doc_store_lock:
+            query = self._doc_store.get(sha256_hex)
+        if query is None:
+            raise PersistedQueryNotFoundError(sha256_hex)
+        return self.parse_and_plan(query, operation_name, options)
+
+    def _normalize(
+        self,
+        operation: OperationDefinitionNode,
+    ) -> tuple[OperationDefinitionNode, dict[str, ValueNode]]:
+        type_info = TypeInfo(self.schema)
+        reserved_names = frozenset(
+            definition.variable.name.value
+            for definition in operation.variable_definitions or ()
+        )
+        visitor = _LiteralToVariableVisitor(type_info, reserved_names)
+        normalized = cast(
+            OperationDefinitionNode, visit(operation, TypeInfoVisitor(type_info, visitor))
+        )
+        if visitor.variable_definitions:
+            # `visit` returned a fresh copy (it made edits), so extending its
+            # definitions does not touch the caller's operation.
+            normalized.variable_definitions = (
+                *(normalized.variable_definitions or ()),
+                *visitor.variable_definitions,
+            )
+        return normalized, visitor.mapping
+
+    def build_normalized_query_plan(
+        self,
+        operation_context: OperationContext,
+        options: Optional[BuildQueryPlanOptions] = None,
+    ) -> tuple[QueryPlan, dict[str, ValueNode]]:
+        """Plans the operation with literal arguments rewritten to variables.
+
+        Operations differing only in literal values collapse to a single
+        cached plan whose fetch operations reference synthetic variables.
+        The returned mapping holds this request's extracted values; the
+        executor must pass them as variable values alongside the plan —
+        the plan alone no longer carries the literals.
+        """
+        operation, mapping = self._normalize(operation_context.operation)
+        operation_context.operation = operation
+        return self.build_query_plan(operation_context, options), mapping
+
+    @staticmethod
+    def serialize_plan(
+        plan: QueryPlan, buffer_callback: 'Optional[Callable[[pickle.PickleBuffer], object]]' = None
+    ) -> bytes:
+        """Serializes a plan for an external (e.g. distributed) plan cache.
+
+        Uses pickle protocol 5; when `buffer_callback` is given, buffer-backed
+        payloads travel out of band to the network writer instead of being
+        copied into the pickle stream.
+        """
+        return pickle.dumps(plan, protocol=5, buffer_callback=buffer_callback)
+
+    @staticmethod
+    def deserialize_plan(data: bytes, buffers: Iterable[bytes] = ()) -> QueryPlan:
+        return cast(QueryPlan, pickle.loads(data, buffers=buffers))
+
+    @staticmethod
+    def _hash_document(document: str) -> bytes:
+        # sha256 dispatches to hardware SHA extensions through OpenSSL where
+        # available, and matches the hash used by APQ-style persisted-query
+        # document IDs. The 16-byte prefix is plenty for an in-process key.
+        return sha256(document.encode('utf-8')).digest()[:16]
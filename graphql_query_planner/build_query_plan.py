@@ -1,11 +1,15 @@
-from copy import copy
+import threading
+from collections import OrderedDict, defaultdict
 from dataclasses import dataclass
 from itertools import chain
-from typing import Callable, Literal, Optional, Union, cast
+from sys import intern
+from typing import Callable, Iterable, Literal, Optional, Union, cast
+from weakref import WeakKeyDictionary
 
 from graphql import (
     ArgumentNode,
     DefinitionNode,
+    DirectiveNode,
     DocumentNode,
     FieldNode,
     FragmentDefinitionNode,
@@ -43,22 +47,19 @@ from graphql import (
 )
 
 from graphql_query_planner.composed_schema.metadata import (
-    FederationEntityTypeMetadata,
-    get_federation_metadata_for_field,
-    get_federation_metadata_for_type,
-    is_entity_type_metadata,
+    FederationSchemaIndex,
+    federation_index_for_schema,
 )
 from graphql_query_planner.field_set import (
     Field,
     FieldSet,
     Scope,
     TParent,
-    group_by_parent_type,
-    group_by_response_name,
+    group_by_response_name_then_parent_type,
     matches_field,
     selection_set_from_field_set,
+    trimmed_selections_from_field_set,
 )
-from graphql_query_planner.polyfill import flat_map
 from graphql_query_planner.query_plan import (
     FetchNode,
     FlattenNode,
@@ -67,17 +68,17 @@ from graphql_query_planner.query_plan import (
     QueryPlan,
     ResponsePath,
     SequenceNode,
-    trim_selection_nodes,
 )
 from graphql_query_planner.shims import GraphQLField
 from graphql_query_planner.utilities.graphql_ import get_field_def, get_response_name
-from graphql_query_planner.utilities.multi_map import MultiMap
-from graphql_query_planner.utilities.predicates import is_not_null_or_undefined
+from graphql_query_planner.utilities.identity_set import IdentitySet
+from graphql_query_planner.utilities.predicates import filter_not_nullish
+from graphql_query_planner.utilities.printer import compact_print
 
 typename_field = FieldNode(name=NameNode(value='__typename'))
 
 
-@dataclass
+@dataclass(slots=True)
 class OperationContext:
     schema: GraphQLSchema
     operation: OperationDefinitionNode
@@ -89,9 +90,77 @@ FragmentName = str
 FragmentMap = dict[FragmentName, FragmentDefinitionNode]
 
 
-@dataclass
+# Frozen with slots so options are cheap to hash — plan-cache keys partition
+# on hash(options).
+@dataclass(frozen=True, slots=True)
 class BuildQueryPlanOptions:
-    auto_fragmentization: bool
+    auto_fragmentization: bool = False
+    # When the supergraph is backed by a single subgraph there is nothing to
+    # split; QueryPlanner can emit a trivial single-fetch plan instead.
+    bypass_planner_for_single_subgraph: bool = False
+    # Also attach the unserialized operation document to each FetchNode, for
+    # executors that need to rewrite subgraph operations. Off by default: the
+    # serialized `operation` string is all plain execution needs, and keeping
+    # the AST alive enlarges cached plans.
+    expose_document_node_in_fetch_node: bool = False
+    # Collapse sibling dependent groups that target the same service at the
+    # same response path into one fetch, saving a subgraph round trip.
+    merge_same_service_fetches: bool = True
+
+
+# Shared default options instance. The dataclass is frozen, so handing the
+# same object to every optionless call is safe and avoids an allocation per
+# request.
+_DEFAULT_OPTIONS = BuildQueryPlanOptions()
+
+
+_PlanCacheKey = tuple[str, str, tuple[str, ...], BuildQueryPlanOptions]
+
+# Printed fragment definitions, weakly keyed by node: fragments come from
+# parsed documents that are reused across requests, so each is printed once.
+_printed_fragment_cache: 'WeakKeyDictionary[FragmentDefinitionNode, str]' = WeakKeyDictionary()
+
+# Plans are expensive to build but deterministic, so replayed operations are
+# served from a per-schema LRU. Keyed by the printed operation rather than
+# node identity: re-parsed copies of the same document must hit. Schemas are
+# weak keys, so a reloaded schema drops its plans with it. Sharing the cached
+# QueryPlan object is safe — plan nodes are frozen dataclasses.
+_PLAN_CACHE_MAX_SIZE = 1000
+_plan_cache: 'WeakKeyDictionary[GraphQLSchema, OrderedDict[_PlanCacheKey, QueryPlan]]' = (
+    WeakKeyDictionary()
+)
+_plan_cache_lock = threading.Lock()
+
+
+def _printed_fragment_bodies(fragments: Iterable[FragmentDefinitionNode]) -> list[str]:
+    # Sorted so the result is independent of definition order; each fragment
+    # node is printed at most once thanks to the weak cache above.
+    printed_fragments = []
+    for fragment in fragments:
+        printed = _printed_fragment_cache.get(fragment)
+        if printed is None:
+            printed = _printed_fragment_cache[fragment] = strip_ignored_characters(
+                print_ast(fragment)
+            )
+        printed_fragments.append(printed)
+    printed_fragments.sort()
+    return printed_fragments
+
+
+def _plan_cache_key(
+    operation_context: OperationContext, options: BuildQueryPlanOptions
+) -> _PlanCacheKey:
+    operation = operation_context.operation
+
+    # Fragment *bodies* are part of the key: two documents can define a
+    # fragment of the same name with different selections, and the printed
+    # operation only mentions the spread name.
+    return (
+        strip_ignored_characters(print_ast(operation)),
+        operation.name.value if operation.name is not None else '',
+        tuple(_printed_fragment_bodies(operation_context.fragments.values())),
+        options,
+    )
 
 
 # TODO: impl debug
@@ -99,9 +168,37 @@ def build_query_plan(
     operation_context: OperationContext,
     options: Optional[BuildQueryPlanOptions] = None,
 ) -> QueryPlan:
-    if options is None:
-        options = BuildQueryPlanOptions(auto_fragmentization=False)
-
+    options = options or _DEFAULT_OPTIONS
+
+    key = _plan_cache_key(operation_context, options)
+    with _plan_cache_lock:
+        cache = _plan_cache.get(operation_context.schema)
+        if cache is None:
+            cache = _plan_cache[operation_context.schema] = OrderedDict()
+        plan = cache.get(key)
+        if plan is not None:
+            cache.move_to_end(key)
+            return plan
+
+    plan = _build_query_plan_uncached(operation_context, options)
+
+    with _plan_cache_lock:
+        cache[key] = plan
+        cache.move_to_end(key)
+        while len(cache) > _PLAN_CACHE_MAX_SIZE:
+            cache.popitem(last=False)
+
+    return plan
+
+
+# The pipeline behind build_query_plan, without the module-level cache.
+# QueryPlanner calls this directly: its sharded cache enforces byte and TTL
+# bounds that the count-bounded cache above would silently undermine by
+# keeping evicted plans alive.
+def _build_query_plan_uncached(
+    operation_context: OperationContext,
+    options: BuildQueryPlanOptions = _DEFAULT_OPTIONS,
+) -> QueryPlan:
     context = build_query_planning_context(operation_context, options)
 
     if context.operation.operation == OperationType.SUBSCRIPTION:
@@ -133,13 +230,30 @@ def build_query_plan(
 
     nodes = [execution_node_for_group(context, group, root_type) for group in groups]
 
-    return QueryPlan(
+    if not nodes:
+        node = None
+    else:
         # if an operation is a mutation, we run the root fields in sequence,
         # otherwise we run them in parallel
-        node=(flat_wrap('Sequence', nodes) if is_mutation else flat_wrap('Parallel', nodes))
-        if nodes
-        else None
+        node = flat_wrap('Sequence' if is_mutation else 'Parallel', nodes)
+    return QueryPlan(node=node)
+
+
+def _serialize_operation(
+    context: 'QueryPlanningContext',
+    group: 'FetchGroup',
+    selection_set: SelectionSetNode,
+    variable_usages: 'VariableUsages',
+    for_entities: bool,
+) -> tuple[DocumentNode, str]:
+    operation = (
+        operation_for_entities_fetch(selection_set, variable_usages, group.internal_fragments)
+        if for_entities
+        else operation_for_root_fetch(
+            selection_set, variable_usages, group.internal_fragments, context.operation.operation
+        )
     )
+    return operation, compact_print(operation)
 
 
 def execution_node_for_group(
@@ -147,125 +261,181 @@ def execution_node_for_group(
     group: 'FetchGroup',
     parent_type: Optional[GraphQLCompositeType] = None,
 ) -> PlanNode:
-    selection_set = selection_set_from_field_set(group.fields, parent_type)
+    # Iterative post-order walk over the group DAG instead of recursion: no
+    # Python frame per dependent group, and a group reachable from several
+    # parents is built once and its PlanNode shared.
+    memo: dict[FetchGroup, PlanNode] = {}
+    dependents: dict[FetchGroup, list[FetchGroup]] = {}
+    stack: list[tuple[FetchGroup, bool]] = [(group, False)]
+
+    while stack:
+        current, children_done = stack.pop()
+        if current in memo:
+            continue
+        if children_done:
+            dependent_nodes = [memo[dependent] for dependent in dependents[current]]
+            memo[current] = _plan_node_for_group(
+                context, current, parent_type if current is group else None, dependent_nodes
+            )
+            continue
+
+        if current.has_dependent_groups:
+            dependent_groups = current.dependent_groups
+            if context.merge_same_service_fetches and len(dependent_groups) > 1:
+                dependent_groups = merge_same_service_groups(dependent_groups)
+        else:
+            dependent_groups = _NO_DEPENDENT_GROUPS
+        dependents[current] = dependent_groups
+
+        stack.append((current, True))
+        for dependent_group in dependent_groups:
+            if dependent_group not in memo:
+                stack.append((dependent_group, False))
+
+    return memo[group]
+
+
+def _plan_node_for_group(
+    context: 'QueryPlanningContext',
+    group: 'FetchGroup',
+    parent_type: Optional[GraphQLCompositeType],
+    dependent_nodes: list[PlanNode],
+) -> PlanNode:
+    selection_set = group.selection_set_for(parent_type)
+    # Required fields go straight to trimmed QueryPlan selections; the
+    # intermediate SelectionSetNode the old two-step pipeline built was
+    # walked once by trim_selection_nodes and discarded.
     requires = (
-        selection_set_from_field_set(group.required_fields)
+        trimmed_selections_from_field_set(group.required_fields)
         if len(group.required_fields) > 0
         else None
     )
     variable_usages = context.get_variable_usages(selection_set, group.internal_fragments)
 
-    operation = (
-        operation_for_entities_fetch(selection_set, variable_usages, group.internal_fragments)
-        if requires is not None
-        else operation_for_root_fetch(
-            selection_set, variable_usages, group.internal_fragments, context.operation.operation
-        )
+    operation, serialized_operation = _serialize_operation(
+        context, group, selection_set, variable_usages, for_entities=requires is not None
     )
 
     fetch_node = FetchNode(
         service_name=group.service_name,
-        requires=trim_selection_nodes(requires.selections) if requires is not None else None,
-        variable_usages=list(variable_usages.keys()),
-        operation=strip_ignored_characters(print_ast(operation)),
+        requires=requires,
+        variable_usages=tuple(variable_usages),
+        operation=serialized_operation,
+        operation_document=operation if context.expose_document_node_in_fetch_node else None,
     )
 
     node: PlanNode = (
         FlattenNode(path=group.merge_at, node=fetch_node)
-        if group.merge_at is not None and len(group.merge_at) > 0
+        if group.merge_at
         else fetch_node
     )
 
-    if len(group.dependent_groups) > 0:
-        dependent_nodes = [
-            execution_node_for_group(context, dependent_group)
-            for dependent_group in group.dependent_groups
-        ]
-
+    if len(dependent_nodes) > 0:
         return flat_wrap('Sequence', [node, flat_wrap('Parallel', dependent_nodes)])
     else:
         return node
 
 
-VariableName = str
-VariableUsages = dict[VariableName, VariableDefinitionNode]
+def merge_same_service_groups(dependent_groups: 'list[FetchGroup]') -> 'list[FetchGroup]':
+    """Collapses sibling groups fetching from the same service at the same path.
+
+    The planner can emit several parallel groups for one service (one from
+    the per-service map plus more inherited from subgroups); fetching them
+    separately costs a full subgraph round trip each. This runs before the
+    groups are serialized into FetchNodes — once a group becomes an
+    operation string, merging would mean re-parsing it.
+    """
+    merged: list[FetchGroup] = []
+    index_by_key: dict[tuple[str, Optional[tuple]], int] = {}
+
+    for group in dependent_groups:
+        key = (group.service_name, group.merge_at)
+        target_index = index_by_key.get(key)
+        if target_index is None:
+            index_by_key[key] = len(merged)
+            merged.append(group)
+            continue
+        target = merged[target_index]
+        target.fields.extend(group.fields)
+        if group.required_fields:
+            if target.required_fields is _EMPTY_FIELDS:
+                target.required_fields = list(group.required_fields)
+            else:
+                target.required_fields.extend(group.required_fields)
+        if group.provided_fields:
+            if target.provided_fields is _EMPTY_FIELDS:
+                target.provided_fields = list(group.provided_fields)
+            else:
+                target.provided_fields.extend(group.provided_fields)
+        if group.internal_fragments:
+            if target.internal_fragments is _EMPTY_FRAGMENTS:
+                target.internal_fragments = IdentitySet(group.internal_fragments)
+            else:
+                target.internal_fragments.update(group.internal_fragments)
+        target.other_dependent_groups.extend(group.dependent_groups)
 
+    return merged
 
-def map_fetch_node_to_variable_definitions(
-    variable_usages: VariableUsages,
-) -> list[VariableDefinitionNode]:
-    return list(variable_usages.values())
+
+VariableName = str
+VariableUsages = dict[VariableName, VariableDefinitionNode]
 
 
 def operation_for_root_fetch(
     selection_set: SelectionSetNode,
     variable_usages: VariableUsages,
-    internal_fragments: set[FragmentDefinitionNode],
+    internal_fragments: Iterable[FragmentDefinitionNode],
     operation: Optional[OperationType] = None,
 ) -> DocumentNode:
     definitions: list[DefinitionNode] = [
         OperationDefinitionNode(
             operation=operation,
             selection_set=selection_set,
-            variable_definitions=map_fetch_node_to_variable_definitions(variable_usages),
+            variable_definitions=list(variable_usages.values()),
         )
     ]
     definitions.extend(internal_fragments)
     return DocumentNode(definitions=definitions)
 
 
+# The `$representations: [_Any!]!` scaffolding of an entities fetch is the
+# same for every group — only the `_entities` selection set and the forwarded
+# variables vary — so the constant nodes are built once and shared. None of
+# them is ever mutated: operations are only printed (and exposed read-only via
+# `expose_document_node_in_fetch_node`).
+_REPRESENTATIONS_VAR = VariableNode(name=NameNode(value='representations'))
+_REPRESENTATIONS_VAR_DEF = VariableDefinitionNode(
+    variable=_REPRESENTATIONS_VAR,
+    type=NonNullTypeNode(
+        type=ListTypeNode(type=NonNullTypeNode(type=NamedTypeNode(name=NameNode(value='_Any'))))
+    ),
+)
+_ENTITIES_FIELD_NAME = NameNode(value='_entities')
+_REPRESENTATIONS_ARG = ArgumentNode(
+    name=NameNode(value='representations'),
+    value=_REPRESENTATIONS_VAR,
+)
+
+
 def operation_for_entities_fetch(
     selection_set: SelectionSetNode,
     variable_usages: VariableUsages,
-    internal_fragments: set[FragmentDefinitionNode],
+    internal_fragments: Iterable[FragmentDefinitionNode],
 ) -> DocumentNode:
-    representations_variable = VariableNode(name=NameNode(value='representations'))
-
-    return DocumentNode(
-        definitions=list(
-            chain(
-                [
-                    OperationDefinitionNode(
-                        operation=OperationType.QUERY,
-                        variable_definitions=list(
-                            chain(
-                                [
-                                    VariableDefinitionNode(
-                                        variable=representations_variable,
-                                        type=NonNullTypeNode(
-                                            type=ListTypeNode(
-                                                type=NonNullTypeNode(
-                                                    type=NamedTypeNode(name=NameNode(value='_Any'))
-                                                )
-                                            )
-                                        ),
-                                    )
-                                ],
-                                map_fetch_node_to_variable_definitions(variable_usages),
-                            )
-                        ),
-                        selection_set=SelectionSetNode(
-                            selections=[
-                                FieldNode(
-                                    name=NameNode(value='_entities'),
-                                    arguments=[
-                                        ArgumentNode(
-                                            name=NameNode(
-                                                value=representations_variable.name.value
-                                            ),
-                                            value=representations_variable,
-                                        )
-                                    ],
-                                    selection_set=selection_set,
-                                )
-                            ]
-                        ),
-                    ),
-                ],
-                internal_fragments,
-            )
-        )
+    op_def = OperationDefinitionNode(
+        operation=OperationType.QUERY,
+        variable_definitions=[_REPRESENTATIONS_VAR_DEF, *variable_usages.values()],
+        selection_set=SelectionSetNode(
+            selections=[
+                FieldNode(
+                    name=_ENTITIES_FIELD_NAME,
+                    arguments=[_REPRESENTATIONS_ARG],
+                    selection_set=selection_set,
+                )
+            ]
+        ),
     )
+    return DocumentNode(definitions=[op_def, *internal_fragments])
 
 
 # Wraps the given nodes in a ParallelNode or SequenceNode, unless there's only
@@ -281,13 +451,20 @@ def flat_wrap(kind: Literal['Parallel', 'Sequence'], nodes: list[PlanNode]) -> P
     if len(nodes) == 1:
         return nodes[0]
 
-    return (
-        ParallelNode(
-            nodes=flat_map(nodes, lambda n: cast(ParallelNode, n).nodes if n.kind == kind else [n])
-        )
-        if kind == 'Parallel'
-        else SequenceNode(nodes=nodes)
-    )
+    # Inline flattening: the flat_map lambda used here before allocated a
+    # one-element list per non-matching node, and flat_wrap runs once per
+    # fetch group.
+    flattened: list[PlanNode] = []
+    append = flattened.append
+    extend = flattened.extend
+    for node in nodes:
+        if node.kind == kind:
+            extend(cast(ParallelNode, node).nodes)
+        else:
+            append(node)
+
+    wrapped = tuple(flattened)
+    return ParallelNode(nodes=wrapped) if kind == 'Parallel' else SequenceNode(nodes=wrapped)
 
 
 # noinspection DuplicatedCode
@@ -324,7 +501,7 @@ def split_root_fields(
 
         return group_for_service(owning_service)
 
-    split_fields(context, [], fields, group_for_field)
+    split_fields(context, (), fields, group_for_field)
 
     return list(groups_by_service.values())
 
@@ -352,9 +529,8 @@ def split_root_fields_serially(
     def group_for_service(service_name: str) -> FetchGroup:
         # If the most recent FetchGroup in the array belongs to the same service,
         # the field in question can be batched within that group.
-        previous_group = fetch_groups[-1]
-        if previous_group and previous_group.service_name == service_name:
-            return previous_group
+        if fetch_groups and fetch_groups[-1].service_name == service_name:
+            return fetch_groups[-1]
 
         # If there's no previous group, or the previous group is from a different
         # service, then we need to add a new FetchGroup.
@@ -381,7 +557,7 @@ def split_root_fields_serially(
 
         return group_for_service(owning_service)
 
-    split_fields(context, [], fields, group_for_field)
+    split_fields(context, (), fields, group_for_field)
 
     return fetch_groups
 
@@ -406,7 +582,7 @@ def split_subfields(
         # be replaced.
         parent_is_value_type = (
             not is_object_type(parent_type) or federation_metadata.is_value_type
-            if (federation_metadata := get_federation_metadata_for_type(parent_type))
+            if (federation_metadata := context.schema_index.type_metadata.get(id(parent_type)))
             else None
         )
 
@@ -432,9 +608,7 @@ def split_subfields(
         if owning_service == base_service:
             # Can we fetch the field from the parent group?
 
-            if owning_service == parent_group.service_name or any(
-                matches_field(field)(f) for f in parent_group.provided_fields
-            ):
+            if owning_service == parent_group.service_name or parent_group.provides_field(field):
                 return parent_group
             else:
                 # We need to fetch the key fields from the parent group first, and then
@@ -454,11 +628,7 @@ def split_subfields(
 
             # Can we fetch the required fields from the parent group?
             if all(
-                any(
-                    matches_field(required_field)(provided_field)
-                    for provided_field in parent_group.provided_fields
-                )
-                for required_field in required_fields
+                parent_group.provides_field(required_field) for required_field in required_fields
             ):
                 if owning_service == parent_group.service_name:
                     return parent_group
@@ -492,10 +662,8 @@ def split_fields(
     fields: FieldSet,
     group_for_field: Callable[[Field[GraphQLObjectType]], 'FetchGroup'],
 ):
-    for fields_for_response_name in group_by_response_name(fields).values():
-        for parent_type, fields_for_parent_type in group_by_parent_type(
-            fields_for_response_name
-        ).items():
+    for fields_by_parent_type in group_by_response_name_then_parent_type(fields).values():
+        for parent_type, fields_for_parent_type in fields_by_parent_type.items():
             # Field nodes that share the same response name and parent type are guaranteed
             # to have the same field name and arguments. We only need the other nodes when
             # merging selection sets, to take node-specific subfields and directives
@@ -511,19 +679,9 @@ def split_fields(
             # TODO: graphql-core's GraphQLField doesn't conform to the origin
             # if (fieldDef.name === TypeNameMetaFieldDef.name) {
             if field_def.name == '__typename':
-                schema = context.schema
-                roots = [
-                    # the redundant cast makes mypy understand `t is not None`
-                    cast(GraphQLObjectType, t).name
-                    for t in [schema.query_type, schema.mutation_type, schema.subscription_type]
-                    if is_not_null_or_undefined(t)
-                ]
-                try:
-                    roots.index(parent_type.name)
+                if parent_type.name in context.root_type_names:
                     # debug.groupEnd("Skipping __typename for root types");
                     continue
-                except ValueError:
-                    pass
 
             # We skip introspection fields like `__schema` and `__type`.
             if is_object_type(parent_type) and parent_type in scope.possible_types:
@@ -549,20 +707,26 @@ def split_fields(
                 # types can be fulfilled by only one service then we don't need to
                 # expand the fields into unique type conditions.
 
-                # Collect all of the field defs on the possible runtime types
-                possible_field_defs = [
-                    context.get_field_def(runtime_type, field.field_node)
-                    for runtime_type in scope.possible_types
-                ]
+                # Collect the field defs on the possible runtime types while
+                # checking for federation metadata, stopping at the first
+                # extending def: once one implementor extends the field the
+                # optimization below is off the table, and the remaining defs
+                # are resolved lazily by the loops that need them. Collected
+                # defs are remembered so those loops never re-resolve.
+                field_defs_by_type: dict[GraphQLObjectType, GraphQLField] = {}
+                has_extending_field_defs = False
+                field_metadata_by_id = context.schema_index.field_metadata
+                for runtime_type in scope.possible_types:
+                    runtime_field_def = context.get_field_def(runtime_type, field.field_node)
+                    field_defs_by_type[runtime_type] = runtime_field_def
+                    if field_metadata_by_id.get(id(runtime_field_def)):
+                        has_extending_field_defs = True
+                        break
 
                 # If none of the field defs have a federation property, this interface's
-                # implementors can all be resolved within the same service.
-                has_no_extending_field_defs = not any(
-                    get_federation_metadata_for_field(field) for field in possible_field_defs
-                )
-
-                # With no extending field definitions, we can engage the optimization
-                if has_no_extending_field_defs:
+                # implementors can all be resolved within the same service,
+                # and we can engage the optimization.
+                if not has_extending_field_defs:
                     # debug.group(() => `No field of ${scope.possibleTypes} have federation`
                     #   ` directives, avoid type explosion.`);
                     group = group_for_field(field)
@@ -576,21 +740,27 @@ def split_fields(
 
                 # We keep track of which possible runtime parent types can be fetched
                 # from which group,
-                groups_by_runtime_parent_types = MultiMap[FetchGroup, GraphQLObjectType]()
+                groups_by_runtime_parent_types: defaultdict[
+                    FetchGroup, list[GraphQLObjectType]
+                ] = defaultdict(list)
 
                 # debug.group('Computing fetch groups by runtime parent types');
                 for runtime_parent_type in scope.possible_types:
-                    field_def = context.get_field_def(runtime_parent_type, field.field_node)
-                    groups_by_runtime_parent_types.add(
+                    if runtime_parent_type in field_defs_by_type:
+                        field_def = field_defs_by_type[runtime_parent_type]
+                    else:
+                        field_def = field_defs_by_type[runtime_parent_type] = (
+                            context.get_field_def(runtime_parent_type, field.field_node)
+                        )
+                    groups_by_runtime_parent_types[
                         group_for_field(
                             Field(
                                 scope=context.new_scope(runtime_parent_type, scope),
                                 field_node=field.field_node,
                                 field_def=field_def,
                             )
-                        ),
-                        runtime_parent_type,
-                    )
+                        )
+                    ].append(runtime_parent_type)
 
                 # debug.groupEnd(`Fetch groups to resolvable runtime types:`);
                 # debug.groupedEntries(groupsByRuntimeParentTypes, debugPrintGroup, `
@@ -607,13 +777,15 @@ def split_fields(
 
                         # debug.group(`For runtime parent type ${runtimeParentType}:`);
 
-                        field_def = context.get_field_def(runtime_parent_type, field.field_node)
+                        field_def = field_defs_by_type[runtime_parent_type]
 
-                        fields_with_runtime_parent_type = []
-                        for x in fields_for_parent_type:
-                            x = copy(x)
-                            x.field_def = field_def
-                            fields_with_runtime_parent_type.append(x)
+                        # Rebind the field def via direct construction;
+                        # copy.copy goes through the generic copy protocol
+                        # and is several times slower than a plain __init__.
+                        fields_with_runtime_parent_type = [
+                            Field(scope=x.scope, field_node=x.field_node, field_def=field_def)
+                            for x in fields_for_parent_type
+                        ]
 
                         group.fields.append(
                             complete_field(
@@ -638,13 +810,18 @@ def complete_field(
     path: ResponsePath,
     fields: FieldSet,
 ) -> Field:
-    field_node = fields[0].field_node
-    field_def = fields[0].field_def
+    first_field = fields[0]
+    field_node = first_field.field_node
+    field_def = first_field.field_def
     return_type = get_named_type(field_def.type)
 
     if not is_composite_type(return_type):
         # FIXME: We should look at all field nodes to make sure we take directives
         # into account (or remove directives for the time being).
+        if first_field.scope is scope:
+            # The Field we'd build is identical to the one we were handed;
+            # scalar leaves dominate real queries, so skip the allocation.
+            return first_field
         return Field(scope=scope, field_node=field_node, field_def=field_def)
     else:
         # For composite types, we need to recurse.
@@ -675,9 +852,7 @@ def complete_field(
 
         parent_group.other_dependent_groups.extend(sub_group.dependent_groups)
 
-        selection_set = selection_set_from_field_set(
-            sub_group.fields, cast(GraphQLCompositeType, return_type)
-        )
+        selection_set = sub_group.selection_set_for(cast(GraphQLCompositeType, return_type))
 
         if context.auto_fragmentization and len(sub_group.fields) > 2:
             internal_fragment = get_internal_fragment(
@@ -685,24 +860,49 @@ def complete_field(
             )
             definition = internal_fragment.definition
             selection_set = internal_fragment.selection_set
+            if parent_group.internal_fragments is _EMPTY_FRAGMENTS:
+                parent_group.internal_fragments = IdentitySet()
             parent_group.internal_fragments.add(definition)
 
         # "Hoist" internalFragments of the subGroup into the parentGroup so all
         # fragments can be included in the final request for the root FetchGroup
-        parent_group.internal_fragments.update(sub_group.internal_fragments)
-
-        new_field_node = copy(field_node)
-        new_field_node.selection_set = selection_set
+        if sub_group.internal_fragments:
+            if parent_group.internal_fragments is _EMPTY_FRAGMENTS:
+                parent_group.internal_fragments = IdentitySet(sub_group.internal_fragments)
+            else:
+                parent_group.internal_fragments.update(sub_group.internal_fragments)
+
+        # Rebuild the node directly rather than copy.copy + attribute swap;
+        # the borrowed child nodes are never mutated, so sharing them is safe.
+        new_field_node = FieldNode(
+            alias=field_node.alias,
+            name=field_node.name,
+            arguments=field_node.arguments,
+            directives=field_node.directives,
+            selection_set=selection_set,
+        )
         return Field(scope=scope, field_node=new_field_node, field_def=field_def)
 
 
+# Printed selection sets cached per node, so repeated fragment lookups for
+# the same node don't re-walk its AST.
+_printed_selection_cache: 'WeakKeyDictionary[SelectionSetNode, str]' = WeakKeyDictionary()
+
+
 def get_internal_fragment(
     selection_set: SelectionSetNode,
     return_type: GraphQLCompositeType,
     context: 'QueryPlanningContext',
 ) -> 'InternalFragment':
-    # TODO: is key correct ?
-    key = str(hash(selection_set))  # const key = JSON.stringify(selectionSet);
+    # Key on the canonical printed form (plus the type condition), so
+    # structurally equal selection sets from different call sites share one
+    # fragment. (JS keyed on JSON.stringify(selectionSet), which is likewise
+    # structural.)
+    printed = _printed_selection_cache.get(selection_set)
+    if printed is None:
+        printed = strip_ignored_characters(print_ast(selection_set))
+        _printed_selection_cache[selection_set] = printed
+    key = f'{printed}|{return_type.name}'
     if key not in context.internal_fragments:
         name = f'__QueryPlanFragment_{context.internal_fragment_count}'
         context.internal_fragment_count += 1
@@ -729,12 +929,27 @@ def collect_fields(
     scope: Scope[GraphQLCompositeType],
     selection_set: SelectionSetNode,
     fields: Optional[FieldSet] = None,
-    visited_fragment_names: Optional[dict[FragmentName, bool]] = None,
+    visited_fragment_names: Optional[set[FragmentName]] = None,
 ) -> FieldSet:
+    # Fresh-accumulator calls on a plain scope (no directives, no enclosing
+    # scope — every such call site builds its scope that way) are memoized on
+    # the context: list items and entity fetches re-collect the same subtrees
+    # repeatedly. Calls that accumulate into an existing field set or carry
+    # fragment-visitation state are never cached.
+    cache_key = None
     if fields is None:
+        if (
+            visited_fragment_names is None
+            and scope.directives is None
+            and scope.enclosing_scope is None
+        ):
+            cache_key = (id(selection_set), id(scope.parent_type))
+            cached = context._collect_fields_cache.get(cache_key)
+            if cached is not None:
+                return list(cached[1])
         fields = []
     if visited_fragment_names is None:
-        visited_fragment_names = {}
+        visited_fragment_names = set()
 
     def get_fragment_condition(
         fragment_: Union[FragmentDefinitionNode, InlineFragmentNode]
@@ -753,7 +968,9 @@ def collect_fields(
             fields.append(Field(scope=scope, field_node=selection, field_def=field_def))
         elif selection.kind == InlineFragmentNode.kind:
             selection = cast(InlineFragmentNode, selection)
-            new_scope = context.new_scope(get_fragment_condition(selection), scope)
+            new_scope = context.new_scope(
+                get_fragment_condition(selection), scope, selection.directives
+            )
             if len(new_scope.possible_types) == 0:
                 pass
             else:
@@ -772,7 +989,8 @@ def collect_fields(
                 # Note that this also applies to `@skip` and `@include`, which could
                 # lead to invalid query plans that fail at runtime because expected
                 # fields are missing from a subgraph response.
-                new_scope.directives = selection.directives
+                # (The directives now travel through new_scope itself, since
+                # interned scopes cannot be mutated after the fact.)
 
                 collect_fields(
                     context, new_scope, selection.selection_set, fields, visited_fragment_names
@@ -789,14 +1007,19 @@ def collect_fields(
             if len(new_scope.possible_types) == 0:
                 continue
 
-            if visited_fragment_names[fragment_name]:
+            if fragment_name in visited_fragment_names:
                 continue
-            visited_fragment_names[fragment_name] = True
+            visited_fragment_names.add(fragment_name)
 
             collect_fields(
                 context, new_scope, fragment.selection_set, fields, visited_fragment_names
             )
 
+    if cache_key is not None:
+        # The entry keeps the selection set alive so the id in the key stays
+        # valid; a copy goes out because callers extend the result.
+        context._collect_fields_cache[cache_key] = (selection_set, fields)
+        return list(fields)
     return fields
 
 
@@ -808,7 +1031,7 @@ def collect_subfields(
     context: 'QueryPlanningContext', return_type: GraphQLCompositeType, fields: FieldSet
 ) -> FieldSet:
     subfields: FieldSet = []
-    visited_fragment_names: dict[FragmentName, bool] = {}
+    visited_fragment_names: set[FragmentName] = set()
 
     for field in fields:
         selection_set = field.field_node.selection_set
@@ -827,15 +1050,58 @@ def collect_subfields(
 
 ServiceName = str
 
+# Shared empty list for leaf groups; read-only by construction.
+_NO_DEPENDENT_GROUPS: 'list[FetchGroup]' = []
+
+# Immutable empty sentinels shared by FetchGroups until first write. Declared
+# with the attribute types they stand in for (the actual objects are an empty
+# frozenset/tuple, so a missed copy-on-write swap fails loudly).
+_EMPTY_FRAGMENTS: 'IdentitySet[FragmentDefinitionNode]' = cast(
+    'IdentitySet[FragmentDefinitionNode]', frozenset()
+)
+_EMPTY_FIELDS: FieldSet = cast(FieldSet, ())
+
 
 class FetchGroup:
+    # Groups are allocated per service per subgraph hop; slots keep these
+    # numerous small objects __dict__-free.
+    __slots__ = (
+        'service_name',
+        'fields',
+        'internal_fragments',
+        'required_fields',
+        '_required_field_keys',
+        'provided_fields',
+        '_provided_index',
+        '_provided_index_size',
+        '_selection_set_cache',
+        'merge_at',
+        '_dependent_groups_by_service',
+        'other_dependent_groups',
+    )
+
     service_name: str
     fields: FieldSet
-    internal_fragments: set[FragmentDefinitionNode]
+    internal_fragments: IdentitySet[FragmentDefinitionNode]
 
     required_fields: FieldSet
+    # (parent type id, response name) pairs already in required_fields, so
+    # overlapping key fields chained through the same service are added once.
+    _required_field_keys: Optional[set[tuple[int, str]]]
     provided_fields: FieldSet
 
+    # Lazily built index of provided_fields by field name, so provides_field
+    # is a dict probe instead of a linear scan. Rebuilt whenever
+    # provided_fields has changed size (it is only ever assigned wholesale or
+    # extended).
+    _provided_index: Optional[dict[str, FieldSet]]
+    _provided_index_size: int
+
+    # Last selection set built from this group's fields, remembered as
+    # (field count, parent type id, node) and reused while the field list
+    # hasn't grown — sparing a full re-traversal per serialization.
+    _selection_set_cache: Optional[tuple[int, int, SelectionSetNode]]
+
     merge_at: Optional[ResponsePath]
 
     _dependent_groups_by_service: dict[ServiceName, 'FetchGroup']
@@ -846,19 +1112,32 @@ class FetchGroup:
         self,
         service_name: str,
         fields: Optional[FieldSet] = None,
-        internal_fragments: Optional[set[FragmentDefinitionNode]] = None,
+        internal_fragments: Optional[IdentitySet[FragmentDefinitionNode]] = None,
     ):
         if fields is None:
             fields = []
         if internal_fragments is None:
-            internal_fragments = set()
-
-        self.service_name = service_name
+            # Most groups never acquire internal fragments, required fields,
+            # or provided fields; they share immutable empty sentinels instead
+            # of each allocating private empty containers. Write sites swap in
+            # a real container first (the immutable sentinels make a missed
+            # swap fail loudly rather than corrupt every group).
+            internal_fragments = _EMPTY_FRAGMENTS
+
+        # Service names key the per-service group dicts constantly during
+        # splitting; interning makes those lookups pointer comparisons.
+        self.service_name = intern(service_name)
         self.fields = fields
         self.internal_fragments = internal_fragments
 
-        self.required_fields = []
-        self.provided_fields = []
+        self.required_fields = _EMPTY_FIELDS
+        self._required_field_keys = None
+        self.provided_fields = _EMPTY_FIELDS
+
+        self._provided_index = None
+        self._provided_index_size = 0
+
+        self._selection_set_cache = None
 
         self.merge_at = None
 
@@ -866,26 +1145,86 @@ class FetchGroup:
 
         self.other_dependent_groups = []
 
+    def selection_set_for(self, parent_type: Optional[GraphQLCompositeType]) -> SelectionSetNode:
+        """Builds (or reuses) the selection set over this group's fields."""
+        cached = self._selection_set_cache
+        if cached is not None and cached[0] == len(self.fields) and cached[1] == id(parent_type):
+            return cached[2]
+        selection_set = selection_set_from_field_set(self.fields, parent_type)
+        self._selection_set_cache = (len(self.fields), id(parent_type), selection_set)
+        return selection_set
+
+    def provides_field(self, field: Field) -> bool:
+        """Whether this group's provided fields contain a match for `field`."""
+        provided = self.provided_fields
+        if not provided:
+            return False
+
+        index = self._provided_index
+        if index is None or self._provided_index_size != len(provided):
+            index = {}
+            for provided_field in provided:
+                index.setdefault(provided_field.field_def.name, []).append(provided_field)
+            self._provided_index = index
+            self._provided_index_size = len(provided)
+
+        candidates = index.get(field.field_def.name)
+        if not candidates:
+            return False
+        matcher = matches_field(field)
+        return any(matcher(provided_field) for provided_field in candidates)
+
     def dependent_group_for_service(
         self, service_name: str, required_fields: FieldSet
     ) -> 'FetchGroup':
-        group = self._dependent_groups_by_service.get(service_name)
+        dependent_groups = self._dependent_groups_by_service
+        group = dependent_groups.get(service_name)
 
         if group is None:
-            group = FetchGroup(service_name)
+            group = dependent_groups[service_name] = FetchGroup(service_name)
             group.merge_at = self.merge_at
-            self._dependent_groups_by_service[service_name] = group
 
         if required_fields:
-            if group.required_fields:
-                group.required_fields.extend(required_fields)
-            else:
-                group.required_fields = required_fields
+            # Chained hops through the same service tend to require the same
+            # key fields (typically `{ id }`); dropping repeats here keeps
+            # both field lists from growing with every hop. Only leaf fields
+            # are deduped: composite requirements share a response name while
+            # selecting different subfields (`org { id }` vs `org { tier }`),
+            # so those are all kept and merged by the downstream groupings.
+            seen = group._required_field_keys
+            if seen is None:
+                seen = group._required_field_keys = set()
+            new_fields: FieldSet = []
+            for required_field in required_fields:
+                field_node = required_field.field_node
+                if field_node.selection_set is not None:
+                    new_fields.append(required_field)
+                    continue
+                key = (
+                    id(required_field.scope.parent_type),
+                    get_response_name(field_node),
+                )
+                if key not in seen:
+                    seen.add(key)
+                    new_fields.append(required_field)
+            if new_fields:
+                if group.required_fields is _EMPTY_FIELDS:
+                    # new_fields is ours, not the caller's list, so adopting
+                    # it wholesale cannot leak later extends to the caller.
+                    group.required_fields = new_fields
+                else:
+                    group.required_fields.extend(new_fields)
 
-            self.fields.extend(required_fields)
+                self.fields.extend(new_fields)
 
         return group
 
+    @property
+    def has_dependent_groups(self) -> bool:
+        # Cheap emptiness probe; `dependent_groups` builds a fresh list per
+        # access, which leaf groups (the majority) never need.
+        return bool(self._dependent_groups_by_service) or bool(self.other_dependent_groups)
+
     @property
     def dependent_groups(self) -> list['FetchGroup']:
         groups = list(self._dependent_groups_by_service.values())
@@ -895,17 +1234,20 @@ class FetchGroup:
 
 def build_query_planning_context(
     operation_context: OperationContext,
-    options: BuildQueryPlanOptions = BuildQueryPlanOptions(auto_fragmentization=False),
+    options: Optional[BuildQueryPlanOptions] = None,
 ) -> 'QueryPlanningContext':
+    options = options or _DEFAULT_OPTIONS
     return QueryPlanningContext(
         operation_context.schema,
         operation_context.operation,
         operation_context.fragments,
         options.auto_fragmentization,
+        options.expose_document_node_in_fetch_node,
+        options.merge_same_service_fetches,
     )
 
 
-@dataclass
+@dataclass(slots=True)
 class InternalFragment:
     name: str
     definition: FragmentDefinitionNode
@@ -921,15 +1263,40 @@ class QueryPlanningContext:
     operation: OperationDefinitionNode
     fragments: FragmentMap
     auto_fragmentization: bool
+    expose_document_node_in_fetch_node: bool
+    merge_same_service_fetches: bool
+
+    # Schema-derived (operation-independent) planning data, computed once per
+    # schema and shared across planning calls.
+    schema_index: FederationSchemaIndex
+
+    # Names of the schema's root operation types, for the per-field
+    # __typename check in split_fields.
+    root_type_names: frozenset[str]
 
     variable_definitions: dict[VariableName, VariableDefinitionNode]
 
+    _variable_usage_cache: 'dict[tuple[int, ...], tuple[SelectionSetNode, tuple, VariableUsages]]'
+
+    # Key/required fields are pure functions of schema metadata, yet are
+    # requested per field during splitting; cached per (type, service) for
+    # the life of this context. Entries are copied on the way out — callers
+    # alias and extend the returned lists.
+    _key_fields_cache: dict[tuple[int, str, bool], FieldSet]
+    _required_fields_cache: dict[tuple[int, str, str], FieldSet]
+    _collect_fields_cache: dict[tuple[int, int], tuple[SelectionSetNode, FieldSet]]
+    _field_def_cache: 'dict[tuple[int, str], GraphQLField]'
+    _scope_interner: 'dict[tuple[int, int, int], Scope]'
+    _possible_types_cache: 'dict[int, tuple[GraphQLType, tuple[GraphQLObjectType, ...]]]'
+
     def __init__(
         self,
         schema: GraphQLSchema,
         operation: OperationDefinitionNode,
         fragments: FragmentMap,
         auto_fragmentization: bool,
+        expose_document_node_in_fetch_node: bool = False,
+        merge_same_service_fetches: bool = True,
     ):
         self.internal_fragments = {}
         self.internal_fragment_count = 0
@@ -938,23 +1305,46 @@ class QueryPlanningContext:
         self.operation = operation
         self.fragments = fragments
         self.auto_fragmentization = auto_fragmentization
+        self.expose_document_node_in_fetch_node = expose_document_node_in_fetch_node
+        self.merge_same_service_fetches = merge_same_service_fetches
+
+        self.schema_index = federation_index_for_schema(schema)
+
+        self._variable_usage_cache = {}
+        self._key_fields_cache = {}
+        self._required_fields_cache = {}
+        self._collect_fields_cache = {}
+        self._field_def_cache = {}
+        self._scope_interner = {}
+        self._possible_types_cache = {}
+
+        self.root_type_names = frozenset(
+            cast(GraphQLObjectType, t).name
+            for t in filter_not_nullish(
+                (schema.query_type, schema.mutation_type, schema.subscription_type)
+            )
+        )
 
-        variable_definitions = {}
-
-        class VariableDefinitionVisitor(Visitor):
-            # noinspection PyMethodMayBeStatic
-            def enter_variable_definition(self, definition: VariableDefinitionNode, *_) -> None:
-                variable_definitions[definition.variable.name.value] = definition
-
-        self.variable_definitions = variable_definitions
-
-        visit(operation, VariableDefinitionVisitor())
+        # Variable definitions can only appear on the operation node itself,
+        # so a direct loop replaces the full-AST visit the original did.
+        self.variable_definitions = {
+            definition.variable.name.value: definition
+            for definition in operation.variable_definitions or ()
+        }
 
     def get_field_def(
         self, parent_type: GraphQLCompositeType, field_node: FieldNode
     ) -> GraphQLField:
         field_name = field_node.name.value
 
+        # The same (type, field) pair is resolved once per occurrence in the
+        # query — thousands of times for wide lists — so results (including
+        # the __typename/__schema/__type meta fields) are cached per context.
+        cache_key = (id(parent_type), field_name)
+        field_def = self._field_def_cache.get(cache_key)
+        if field_def is not None:
+            return field_def
+
         field_def = get_field_def(self.schema, parent_type, field_name)
 
         if field_def is None:
@@ -962,20 +1352,40 @@ class QueryPlanningContext:
                 f'Cannot query field {field_node.name.value}' ' on type ${parent_type}', field_node
             )
 
+        self._field_def_cache[cache_key] = field_def
         return field_def
 
     def get_possible_types(
         self, type_: Union[GraphQLAbstractType, GraphQLObjectType]
-    ) -> list[GraphQLObjectType]:
-        return (
-            self.schema.get_possible_types(cast(GraphQLAbstractType, type_))
+    ) -> tuple[GraphQLObjectType, ...]:
+        # A shared tuple per type instead of a fresh list per call: scopes
+        # keep references to these, and one traversal asks about the same
+        # types over and over. The entry pins the type so its id stays valid.
+        cached = self._possible_types_cache.get(id(type_))
+        if cached is not None:
+            return cached[1]
+
+        possible_types = (
+            tuple(self.schema.get_possible_types(cast(GraphQLAbstractType, type_)))
             if is_abstract_type(type_)
-            else [cast(GraphQLObjectType, type_)]
+            else (cast(GraphQLObjectType, type_),)
         )
+        self._possible_types_cache[id(type_)] = (type_, possible_types)
+        return possible_types
 
     def get_variable_usages(
-        self, selection_set: SelectionSetNode, fragments: set[FragmentDefinitionNode]
+        self, selection_set: SelectionSetNode, fragments: Iterable[FragmentDefinitionNode]
     ) -> VariableUsages:
+        # One walk per unique (selection set, fragments) pair per plan:
+        # dependent groups routinely ask about the same nodes again. Entries
+        # hold the nodes themselves so the ids in the key stay valid for the
+        # life of this (per-request) context. Callers treat the returned
+        # mapping as read-only.
+        cache_key = (id(selection_set), *sorted(map(id, fragments)))
+        cached = self._variable_usage_cache.get(cache_key)
+        if cached is not None:
+            return cached[2]
+
         usages: dict[str, VariableDefinitionNode] = {}
 
         # Construct a document of the selection set and fragment definitions so we
@@ -995,44 +1405,66 @@ class QueryPlanningContext:
 
         visit(document, VariableVisitor())
 
+        self._variable_usage_cache[cache_key] = (selection_set, tuple(fragments), usages)
         return usages
 
     def new_scope(
-        self, parent_type: TParent, enclosing_scope: Optional[Scope[GraphQLCompositeType]] = None
+        self,
+        parent_type: TParent,
+        enclosing_scope: Optional[Scope[GraphQLCompositeType]] = None,
+        directives: Optional[list[DirectiveNode]] = None,
     ) -> Scope[TParent]:
-        return Scope(
+        # Scopes are flyweights: identity doesn't matter and many fields in
+        # one traversal share (parent type, enclosing scope, directives), so
+        # duplicates collapse to one interned instance. Directives therefore
+        # must come in through this constructor path — interned scopes are
+        # shared and must never be mutated afterwards.
+        cache_key = (
+            id(parent_type),
+            id(enclosing_scope) if enclosing_scope is not None else 0,
+            id(directives) if directives is not None else 0,
+        )
+        scope = self._scope_interner.get(cache_key)
+        if scope is not None:
+            return scope
+
+        scope = Scope(
             parent_type=parent_type,
-            possible_types=[
+            possible_types=tuple(
                 type_
                 for type_ in self.get_possible_types(parent_type)
                 if type_ in enclosing_scope.possible_types
-            ]
+            )
             if enclosing_scope is not None
             else self.get_possible_types(parent_type),
+            directives=directives,
             enclosing_scope=enclosing_scope,
         )
+        # The scope holds every object whose id is in the key, so the ids
+        # cannot be recycled while the entry lives.
+        self._scope_interner[cache_key] = scope
+        return scope
 
-    # noinspection PyMethodMayBeStatic
     def get_base_service(self, parent_type: GraphQLObjectType) -> Optional[str]:
-        type_ = get_federation_metadata_for_type(parent_type)
-        return (
-            cast(FederationEntityTypeMetadata, type_).graph_name
-            if type_ is not None and is_entity_type_metadata(type_)
-            else None
-        )
+        return self.schema_index.base_services.get(parent_type.name)
 
     def get_owning_service(
         self, parent_type: GraphQLObjectType, field_def: GraphQLField
     ) -> Optional[str]:
-        field = get_federation_metadata_for_field(field_def)
-        if field is not None and field.graph_name:
-            return field.graph_name
+        owner = self.schema_index.field_owners.get((parent_type.name, field_def.name))
+        if owner is not None:
+            return owner
         else:
             return self.get_base_service(parent_type)
 
     def get_key_fields(
         self, parent_type: GraphQLCompositeType, service_name: str, fetch_all: Optional[bool] = None
     ) -> FieldSet:
+        cache_key = (id(parent_type), service_name, bool(fetch_all))
+        cached = self._key_fields_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
         key_fields: FieldSet = [
             Field(
                 scope=Scope(
@@ -1044,12 +1476,7 @@ class QueryPlanningContext:
         ]
 
         for possible_type in self.get_possible_types(parent_type):
-            type_ = get_federation_metadata_for_type(possible_type)
-            keys = (
-                cast(FederationEntityTypeMetadata, type_).keys.get(service_name)
-                if type_ is not None and is_entity_type_metadata(type_)
-                else None
-            )
+            keys = self.schema_index.type_keys.get((possible_type.name, service_name))
 
             if not keys:
                 continue
@@ -1070,14 +1497,20 @@ class QueryPlanningContext:
                     )
                 )
 
-        return key_fields
+        self._key_fields_cache[cache_key] = key_fields
+        return list(key_fields)
 
     def get_required_fields(
         self, parent_type: GraphQLCompositeType, field_def: GraphQLField, service_name: str
     ) -> FieldSet:
+        cache_key = (id(parent_type), field_def.name, service_name)
+        cached = self._required_fields_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
         required_fields = self.get_key_fields(parent_type, service_name)
 
-        field_federation_metadata = get_federation_metadata_for_field(field_def)
+        field_federation_metadata = self.schema_index.field_metadata.get(id(field_def))
         if field_federation_metadata is not None and field_federation_metadata.requires:
             required_fields.extend(
                 collect_fields(
@@ -1087,20 +1520,23 @@ class QueryPlanningContext:
                 )
             )
 
-        return required_fields
+        self._required_fields_cache[cache_key] = required_fields
+        return list(required_fields)
 
     # TODO
     def get_provided_fields(self, field_def: GraphQLField, service_name: str) -> FieldSet:
         pass
 
 
-def add_path(path: ResponsePath, response_name: str, type_: GraphQLType):
-    path = path[:]
-    path.append(response_name)
+def add_path(path: ResponsePath, response_name: str, type_: GraphQLType) -> ResponsePath:
+    # Tuple concatenation instead of list copy + append: one C-level alloc,
+    # and the resulting path is immutable and hashable, so it can go straight
+    # into FlattenNode and into dict keys.
+    path = path + (response_name,)
 
     while not is_named_type(type_):
         if is_list_type(type_):
-            path.append('@')
+            path = path + ('@',)
 
         # GraphQLType have two direct subtypes: GraphQLNamedType and GraphQLWrappingType
         # if type_ is not a GraphQLNamedType, then it must be a GraphQLWrappingType
@@ -1,11 +1,31 @@
+from dataclasses import dataclass, field
+from sys import intern
 from typing import Optional, Union, cast
-
-from graphql import FieldNode, GraphQLObjectType, InlineFragmentNode
+from weakref import WeakKeyDictionary
+
+from graphql import (
+    FieldNode,
+    GraphQLObjectType,
+    GraphQLSchema,
+    InlineFragmentNode,
+    is_composite_type,
+    is_object_type,
+    is_union_type,
+)
 
 from graphql_query_planner.shims import GraphQLField
 from graphql_query_planner.utilities.multi_map import MultiMap
 
 
+def get_federation_metadata_for_schema(
+    schema: GraphQLSchema,
+) -> Optional['FederationSchemaMetadata']:
+    if schema.extensions is not None:
+        return cast(Optional[FederationSchemaMetadata], schema.extensions.get('federation'))
+    else:
+        return None
+
+
 def get_federation_metadata_for_type(
     type_: GraphQLObjectType,
 ) -> Optional['FederationTypeMetadata']:
@@ -62,3 +82,79 @@ class FederationFieldMetadata:
     graph_name: Optional[GraphName]
     requires: Optional[FieldSet]
     provides: Optional[FieldSet]
+
+
+TypeName = str
+FieldName = str
+
+
+@dataclass
+class FederationSchemaIndex:
+    """Planning lookups derived from federation metadata.
+
+    All of this is a pure function of the schema — none of it depends on the
+    operation being planned — so it is computed once per schema instead of
+    being re-derived from `extensions` dicts on every planning call.
+    """
+
+    # (type name, field name) -> graph owning the field, for fields that
+    # carry their own federation metadata.
+    field_owners: dict[tuple[TypeName, FieldName], GraphName] = field(default_factory=dict)
+    # type name -> graph owning the (entity) type.
+    base_services: dict[TypeName, GraphName] = field(default_factory=dict)
+    # (type name, graph name) -> @key selection sets for the type in that graph.
+    type_keys: dict[tuple[TypeName, GraphName], list[FieldSet]] = field(default_factory=dict)
+    # id(type) / id(field def) -> federation metadata, for the hot lookups the
+    # planner makes per field. The ids stay valid for the life of the index:
+    # it is cached against the schema, which keeps all its types and field
+    # definitions alive.
+    type_metadata: dict[int, FederationTypeMetadata] = field(default_factory=dict)
+    field_metadata: dict[int, 'FederationFieldMetadata'] = field(default_factory=dict)
+
+
+_schema_index_cache: 'WeakKeyDictionary[GraphQLSchema, FederationSchemaIndex]' = (
+    WeakKeyDictionary()
+)
+
+
+def federation_index_for_schema(schema: GraphQLSchema) -> FederationSchemaIndex:
+    index = _schema_index_cache.get(schema)
+    if index is None:
+        index = _build_federation_index(schema)
+        _schema_index_cache[schema] = index
+    return index
+
+
+def _build_federation_index(schema: GraphQLSchema) -> FederationSchemaIndex:
+    index = FederationSchemaIndex()
+
+    # All identifiers are interned while the index is built: downstream dict
+    # lookups and equality checks on type/field/subgraph names then reduce to
+    # pointer comparisons in CPython.
+    for type_name, type_ in schema.type_map.items():
+        if not is_composite_type(type_):
+            continue
+        type_name = intern(type_name)
+
+        type_metadata = get_federation_metadata_for_type(cast(GraphQLObjectType, type_))
+        if type_metadata is not None:
+            index.type_metadata[id(type_)] = type_metadata
+            if is_object_type(type_) and is_entity_type_metadata(type_metadata):
+                entity_metadata = cast(FederationEntityTypeMetadata, type_metadata)
+                index.base_services[type_name] = intern(entity_metadata.graph_name)
+                for graph_name, keys in entity_metadata.keys.items():
+                    index.type_keys[(type_name, intern(graph_name))] = keys
+
+        if is_union_type(type_):
+            continue
+        fields = cast(GraphQLObjectType, type_).fields
+        for field_name, field_def in fields.items():
+            field_metadata = get_federation_metadata_for_field(cast(GraphQLField, field_def))
+            if field_metadata is not None:
+                index.field_metadata[id(field_def)] = field_metadata
+                if field_metadata.graph_name:
+                    index.field_owners[(type_name, intern(field_name))] = intern(
+                        field_metadata.graph_name
+                    )
+
+    return index
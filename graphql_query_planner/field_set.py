@@ -1,5 +1,7 @@
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import Callable, Generic, Optional, TypeVar, cast
+from sys import intern
+from typing import Callable, Generic, Optional, TypeVar
 
 from graphql import (
     DirectiveNode,
@@ -11,24 +13,36 @@ from graphql import (
 )
 
 from graphql_query_planner.polyfill import flat_map
+from graphql_query_planner.query_plan import (
+    QueryPlanFieldNode,
+    QueryPlanInlineFragmentNode,
+    QueryPlanSelectionNode,
+    trim_selection_nodes,
+)
 from graphql_query_planner.shims import GraphQLField
-from graphql_query_planner.utilities.array import group_by
-from graphql_query_planner.utilities.graphql_ import get_response_name
 
 TParent = TypeVar('TParent', bound=GraphQLCompositeType, contravariant=True)
 
 
-@dataclass
+# Fields and scopes are created in huge numbers while splitting large
+# queries; slots=True drops the per-instance __dict__ and makes attribute
+# access a fixed-offset load. eq=False keeps identity comparison and
+# hashing: the planner never treats two distinct instances as equal (scopes
+# are interned, fields are grouped by name/type), and field-wise __eq__
+# would make them unhashable.
+@dataclass(slots=True, eq=False)
 class Field(Generic[TParent]):
     scope: 'Scope[TParent]'
     field_node: FieldNode
     field_def: GraphQLField
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class Scope(Generic[TParent]):
     parent_type: TParent
-    possible_types: list[GraphQLObjectType]
+    # A shared tuple (see QueryPlanningContext.get_possible_types); scopes
+    # never mutate it.
+    possible_types: tuple[GraphQLObjectType, ...]
     directives: Optional[list[DirectiveNode]] = None
     enclosing_scope: Optional['Scope[GraphQLCompositeType]'] = None
 
@@ -44,16 +58,45 @@ def matches_field(field: Field) -> Callable[[Field], bool]:
     return matcher
 
 
-group_by_response_name = cast(
-    Callable[[list[Field]], dict[str, list[Field]]],
-    group_by(lambda field: get_response_name(field.field_node)),
-)
-
-
-group_by_parent_type = cast(
-    Callable[[list[Field]], dict[GraphQLCompositeType, list[Field]]],
-    group_by(lambda field: field.scope.parent_type),
-)
+# Specialized groupings instead of group_by(lambda): both run for every
+# selection set built, and inlining the key extraction drops a Python call
+# per field.
+def group_by_response_name(fields: list[Field]) -> dict[str, list[Field]]:
+    grouped: defaultdict[str, list[Field]] = defaultdict(list)
+    intern_ = intern
+    for field in fields:
+        # get_response_name inlined (minus one Python call per field);
+        # interning is kept so the grouping keys compare by pointer.
+        field_node = field.field_node
+        response_name = intern_((field_node.alias or field_node.name).value)
+        grouped[response_name].append(field)
+    return grouped
+
+
+def group_by_parent_type(fields: list[Field]) -> dict[GraphQLCompositeType, list[Field]]:
+    grouped: defaultdict[GraphQLCompositeType, list[Field]] = defaultdict(list)
+    for field in fields:
+        grouped[field.scope.parent_type].append(field)
+    return grouped
+
+
+def group_by_response_name_then_parent_type(
+    fields: FieldSet,
+) -> dict[str, dict[GraphQLCompositeType, FieldSet]]:
+    """Groups fields by response name, then by parent type, in one pass.
+
+    Fuses `group_by_response_name` with the per-group `group_by_parent_type`
+    calls that callers would otherwise make in a loop: one traversal of
+    `fields` instead of one plus one per response name.
+    """
+    grouped: dict[str, dict[GraphQLCompositeType, FieldSet]] = {}
+    intern_ = intern
+    for field in fields:
+        field_node = field.field_node
+        response_name = intern_((field_node.alias or field_node.name).value)
+        by_parent_type = grouped.setdefault(response_name, {})
+        by_parent_type.setdefault(field.scope.parent_type, []).append(field)
+    return grouped
 
 
 def selection_set_from_field_set(
@@ -81,6 +124,56 @@ def selection_set_from_field_set(
     )
 
 
+def trimmed_selections_from_field_set(fields: FieldSet) -> list[QueryPlanSelectionNode]:
+    """Builds the trimmed `requires` selections for a FetchNode directly.
+
+    Fuses `selection_set_from_field_set` with `trim_selection_nodes` for the
+    required-fields path: each field goes straight to QueryPlan selection
+    nodes, with no intermediate SelectionSetNode tree that would immediately
+    be walked again and thrown away.
+    """
+    selections: list[QueryPlanSelectionNode] = []
+    for parent_type, fields_by_parent_type in group_by_parent_type(fields).items():
+        field_selections: list[QueryPlanSelectionNode] = []
+        for fields_by_response_name in group_by_response_name(fields_by_parent_type).values():
+            field_node = fields_by_response_name[0].field_node
+            field_selections.append(
+                QueryPlanFieldNode(
+                    alias=field_node.alias.value if field_node.alias is not None else None,
+                    name=field_node.name.value,
+                    selections=_trimmed_selections_of_group(fields_by_response_name),
+                )
+            )
+        selections.append(
+            QueryPlanInlineFragmentNode(
+                type_condition=parent_type.name, selections=field_selections
+            )
+        )
+    return selections
+
+
+def _trim_selection_set(
+    selection_set: Optional[SelectionSetNode],
+) -> Optional[list[QueryPlanSelectionNode]]:
+    if selection_set is None:
+        return None
+    return trim_selection_nodes(selection_set.selections) or None
+
+
+def _trimmed_selections_of_group(fields: FieldSet) -> Optional[list[QueryPlanSelectionNode]]:
+    # Duplicate response names merge their subselections across all grouped
+    # nodes (the combineFields behaviour from graphql-js); taking only the
+    # first node would drop the other nodes' subtrees.
+    if len(fields) == 1:
+        return _trim_selection_set(fields[0].field_node.selection_set)
+    merged: list[SelectionNode] = []
+    for field in fields:
+        selection_set = field.field_node.selection_set
+        if selection_set is not None:
+            merged.extend(selection_set.selections)
+    return trim_selection_nodes(merged) or None
+
+
 # TODO
 def wrap_in_inline_fragment_if_needed(
     selections: list[SelectionNode],
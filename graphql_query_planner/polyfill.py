@@ -1,5 +1,5 @@
-from collections import Iterable
-from typing import Callable, TypeVar, Union
+from collections.abc import Iterable
+from typing import Callable, TypeVar, Union, cast
 
 T = TypeVar('T')
 U = TypeVar('U')
@@ -7,11 +7,17 @@ U = TypeVar('U')
 
 def flat_map(iterable: Iterable[T], func: Callable[[T], Union[list[U], U]]) -> list[U]:
     result: list[U] = []
+    extend = result.extend
+    append = result.append
     for e in iterable:
         r = func(e)
-        if isinstance(r, Iterable):
-            result.extend(r)
+        # The JS flatMap this polyfills only flattens arrays, so an exact
+        # list check is correct (strings stay whole) and skips the ABC
+        # __instancecheck__ walk isinstance(r, Iterable) paid per element.
+        if type(r) is list:
+            extend(r)
         else:
-            result.append(r)
+            # mypy cannot narrow the union through the exact type check.
+            append(cast(U, r))
 
     return result
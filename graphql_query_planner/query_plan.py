@@ -1,13 +1,23 @@
 from dataclasses import dataclass
 from numbers import Number
-from typing import Optional, Union
+from typing import Optional, Sequence, Union
 
-from graphql import SelectionNode as GraphQLJSSelectionNode
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    InlineFragmentNode,
+    SelectionNode as GraphQLJSSelectionNode,
+)
 
-ResponsePath = list[Union[str, Number]]
+# A tuple rather than a list: paths are immutable once emitted, shared
+# between plan nodes, and hashable for cache keys.
+ResponsePath = tuple[Union[str, Number], ...]
 
 
-@dataclass
+# Plan nodes are frozen: a cached QueryPlan is handed out to every caller by
+# reference, so the tree must never be mutated after construction. Freezing
+# also removes the need for defensive deep-copies on cache hits.
+@dataclass(frozen=True, slots=True)
 class QueryPlan:
     kind = 'QueryPlan'
     node: Optional['PlanNode']
@@ -16,28 +26,34 @@ class QueryPlan:
 PlanNode = Union['SequenceNode', 'ParallelNode', 'FetchNode', 'FlattenNode']
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SequenceNode:
     kind = 'Sequence'
-    nodes: list[PlanNode]
+    nodes: tuple[PlanNode, ...]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ParallelNode:
     kind = 'Parallel'
-    nodes: list[PlanNode]
+    nodes: tuple[PlanNode, ...]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FetchNode:
     kind = 'Fetch'
     service_name: str
-    variable_usages: Optional[list[str]]
+    variable_usages: Optional[tuple[str, ...]]
     requires: Optional[list['QueryPlanSelectionNode']]
+    # The subgraph operation, serialized once at planning time so execution
+    # never re-prints the AST per request.
     operation: str
+    # The unserialized operation document, populated only when
+    # `expose_document_node_in_fetch_node` is set — executors that rewrite
+    # subgraph operations need the AST, everyone else just sends `operation`.
+    operation_document: Optional[DocumentNode] = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FlattenNode:
     kind = 'Flatten'
     path: ResponsePath
@@ -56,7 +72,7 @@ class QueryPlanFieldNode:
     kind = 'Field'
     alias: Optional[str]
     name: str
-    selections: Optional[QueryPlanSelectionNode]
+    selections: Optional[list[QueryPlanSelectionNode]]
 
 
 @dataclass(frozen=True)
@@ -66,8 +82,38 @@ class QueryPlanInlineFragmentNode:
     selections: list[QueryPlanSelectionNode]
 
 
-# TODO
 def trim_selection_nodes(  # L80
-    selections: list[GraphQLJSSelectionNode],
+    selections: Sequence[GraphQLJSSelectionNode],
 ) -> list[QueryPlanSelectionNode]:
-    pass
+    """Converts AST selections into their trimmed QueryPlan counterparts.
+
+    Only fields and inline fragments can appear (see QueryPlanSelectionNode);
+    empty inline fragments are dropped. Exact type checks: the selections the
+    planner builds are plain FieldNode/InlineFragmentNode instances, so the
+    isinstance subclass walk is not needed.
+    """
+    trimmed: list[QueryPlanSelectionNode] = []
+    for selection in selections:
+        if type(selection) is FieldNode:
+            selection_set = selection.selection_set
+            trimmed.append(
+                QueryPlanFieldNode(
+                    alias=selection.alias.value if selection.alias is not None else None,
+                    name=selection.name.value,
+                    selections=trim_selection_nodes(selection_set.selections)
+                    if selection_set is not None
+                    else None,
+                )
+            )
+        elif type(selection) is InlineFragmentNode:
+            sub_selections = trim_selection_nodes(selection.selection_set.selections)
+            if sub_selections:
+                trimmed.append(
+                    QueryPlanInlineFragmentNode(
+                        type_condition=selection.type_condition.name.value
+                        if selection.type_condition is not None
+                        else None,
+                        selections=sub_selections,
+                    )
+                )
+    return trimmed
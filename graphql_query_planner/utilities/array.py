@@ -1,17 +1,23 @@
 from collections import defaultdict
+from functools import partial
 from typing import Callable, Iterable, TypeVar
 
 T = TypeVar('T')
 U = TypeVar('U')
 
 
-def group_by(key_function: Callable[[T], U]) -> Callable[[Iterable[T]], dict[U, list[T]]]:
-    def impl(iterable: Iterable[T]) -> dict[U, list[T]]:
-        result = defaultdict(list)
+def _group_by_impl(key_function: Callable[[T], U], iterable: Iterable[T]) -> dict[U, list[T]]:
+    result = defaultdict(list)
+
+    for element in iterable:
+        result[key_function(element)].append(element)
 
-        for element in iterable:
-            result[key_function(element)].append(element)
+    return result
 
-        return result
 
-    return impl
+def group_by(key_function: Callable[[T], U]) -> Callable[[Iterable[T]], dict[U, list[T]]]:
+    # partial over a module-level worker instead of a nested closure: the key
+    # function becomes a fast-local parameter of the loop rather than a
+    # closure cell dereferenced per element, and no code object is created
+    # per group_by call.
+    return partial(_group_by_impl, key_function)
@@ -1,8 +1,12 @@
+from copy import copy
+from sys import intern
 from typing import Optional, cast
+from weakref import WeakKeyDictionary, WeakSet
 
 from graphql import (
     FieldNode,
     GraphQLCompositeType,
+    GraphQLInputObjectType,
     GraphQLInterfaceType,
     GraphQLObjectType,
     GraphQLSchema,
@@ -14,6 +18,46 @@ from graphql import (
 
 from graphql_query_planner.shims import GraphQLField
 
+# Resolved field definitions per schema, keyed by (parent type id, field
+# name). The schema (the weak key) owns its types, so the ids stay valid for
+# the cache's lifetime. Negative results are cached too — the resolution
+# branches below are only ever taken once per (type, field) pair.
+_field_def_cache: 'WeakKeyDictionary[GraphQLSchema, dict[tuple[int, str], Optional[GraphQLField]]]' = (  # noqa: E501
+    WeakKeyDictionary()
+)
+
+
+_interned_schemas: 'WeakSet[GraphQLSchema]' = WeakSet()
+
+
+def intern_schema(schema: GraphQLSchema) -> None:
+    """Interns the field-name keys of every fields map in the schema.
+
+    Field names read off AST nodes are interned already (see
+    get_response_name), so once the schema-side keys are interned too, the
+    `parent_type.fields` probes in get_field_def hit the cached-hash,
+    pointer-equality fast path instead of comparing string contents.
+    """
+    if schema in _interned_schemas:
+        return
+    for type_ in schema.type_map.values():
+        # `fields` is a cached_property on object, interface, and input
+        # object types; replacing it with a rebuilt dict keeps the field
+        # objects themselves (and thus their identities) intact.
+        if isinstance(type_, (GraphQLInterfaceType, GraphQLObjectType)):
+            type_.fields = {intern(name): field for name, field in type_.fields.items()}
+        elif isinstance(type_, GraphQLInputObjectType):
+            type_.fields = {intern(name): field for name, field in type_.fields.items()}
+    _interned_schemas.add(schema)
+
+
+def _named_meta_field(field_def: object, name: str) -> GraphQLField:
+    # A pre-named copy per schema cache, instead of stamping `name` onto the
+    # module-level meta field defs graphql-core shares between all schemas.
+    result = copy(cast(GraphQLField, field_def))
+    result.name = name
+    return result
+
 
 # Not exactly the same as the executor's definition of getFieldDef, in this
 # statically evaluated environment we do not always have an Object type,
@@ -21,27 +65,39 @@ from graphql_query_planner.shims import GraphQLField
 def get_field_def(
     schema: GraphQLSchema, parent_type: GraphQLCompositeType, field_name: str
 ) -> Optional[GraphQLField]:
-    if field_name == '__schema' and schema.query_type == parent_type:
-        result = cast(GraphQLField, SchemaMetaFieldDef)
-        result.name = '__schema'
-        return result
-    if field_name == '__type' and schema.query_type == parent_type:
-        result = cast(GraphQLField, TypeMetaFieldDef)
-        result.name = '__type'
-        return result
-    if field_name == '__typename' and isinstance(
+    cache = _field_def_cache.get(schema)
+    if cache is None:
+        cache = _field_def_cache[schema] = {}
+
+    key = (id(parent_type), field_name)
+    if key in cache:
+        return cache[key]
+
+    result: Optional[GraphQLField]
+    if field_name == '__schema' and schema.query_type is parent_type:
+        result = _named_meta_field(SchemaMetaFieldDef, '__schema')
+    elif field_name == '__type' and schema.query_type is parent_type:
+        result = _named_meta_field(TypeMetaFieldDef, '__type')
+    elif field_name == '__typename' and isinstance(
         parent_type, (GraphQLObjectType, GraphQLInterfaceType, GraphQLUnionType)
     ):
-        result = cast(GraphQLField, TypeNameMetaFieldDef)
-        result.name = '__typename'
-        return result
-    if isinstance(parent_type, (GraphQLObjectType, GraphQLInterfaceType)):
-        field: GraphQLField = parent_type.fields[field_name]
-        field.name = field_name
-        return field
+        result = _named_meta_field(TypeNameMetaFieldDef, '__typename')
+    elif isinstance(parent_type, (GraphQLObjectType, GraphQLInterfaceType)):
+        # The field object itself (not a copy): federation metadata is indexed
+        # by the identity of the defs hanging off the schema's types.
+        result = parent_type.fields.get(field_name)
+        if result is not None:
+            result.name = field_name
+    else:
+        result = None
 
-    return None
+    cache[key] = result
+    return result
 
 
 def get_response_name(node: FieldNode) -> str:
-    return node.alias.value if node.alias is not None else node.name.value
+    # Interned: response names key the grouping dicts in field splitting on
+    # every field, and interned keys resolve with pointer comparisons.
+    # `alias` is either None or a (truthy) NameNode, so `or` picks the right
+    # node in one jump instead of a compare-against-None branch.
+    return intern((node.alias or node.name).value)
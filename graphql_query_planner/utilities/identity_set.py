@@ -0,0 +1,37 @@
+from typing import Generic, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class IdentitySet(Generic[T]):
+    """A set keyed on object identity.
+
+    graphql-core AST nodes compare and hash structurally, so membership in a
+    plain set hashes whole subtrees; keying on id() makes insertion and
+    lookup O(1). Entries hold strong references to their items, so an id
+    cannot be recycled while it is in the set.
+    """
+
+    __slots__ = ('_by_id',)
+
+    def __init__(self, items: Optional[Iterable[T]] = None):
+        self._by_id: dict[int, T] = {}
+        if items is not None:
+            self.update(items)
+
+    def add(self, item: T) -> None:
+        self._by_id[id(item)] = item
+
+    def update(self, items: Iterable[T]) -> None:
+        by_id = self._by_id
+        for item in items:
+            by_id[id(item)] = item
+
+    def __contains__(self, item: object) -> bool:
+        return id(item) in self._by_id
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._by_id.values())
+
+    def __len__(self) -> int:
+        return len(self._by_id)
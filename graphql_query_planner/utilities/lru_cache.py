@@ -0,0 +1,65 @@
+from collections import OrderedDict
+from typing import Callable, Generic, Optional, TypeVar
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+
+class LRUCache(Generic[K, V]):
+    """A minimal LRU cache built on OrderedDict.
+
+    OrderedDict's move_to_end and popitem are C-implemented, so a hit costs
+    two C-level dict operations with no interpreter bookkeeping — the hot
+    path once plans are cached.
+
+    When `getsizeof` is given, `maxsize` bounds the sum of entry sizes (e.g.
+    bytes) instead of the entry count. Entry sizes are computed once on
+    insertion and remembered, so evictions never re-measure values.
+    """
+
+    __slots__ = ('maxsize', 'currsize', '_data', '_sizes', '_getsizeof')
+
+    maxsize: int
+    currsize: int
+
+    def __init__(self, maxsize: int, getsizeof: Optional[Callable[[V], int]] = None):
+        self.maxsize = maxsize
+        self.currsize = 0
+        self._data: 'OrderedDict[K, V]' = OrderedDict()
+        self._sizes: dict[K, int] = {}
+        self._getsizeof = getsizeof
+
+    def get(self, key: K) -> Optional[V]:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        data = self._data
+
+        if self._getsizeof is None:
+            data[key] = value
+            data.move_to_end(key)
+            while len(data) > self.maxsize:
+                data.popitem(last=False)
+            return
+
+        if key in data:
+            self.currsize -= self._sizes.pop(key)
+        size = self._getsizeof(value)
+        data[key] = value
+        data.move_to_end(key)
+        self._sizes[key] = size
+        self.currsize += size
+        # Never evict the entry just inserted, even if it alone exceeds the
+        # budget — a plan we cannot cache at all would be re-planned forever.
+        while self.currsize > self.maxsize and len(data) > 1:
+            evicted_key, _ = data.popitem(last=False)
+            self.currsize -= self._sizes.pop(evicted_key)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._data
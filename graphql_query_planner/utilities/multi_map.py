@@ -1,12 +1,44 @@
-from typing import Generic, TypeVar
+from typing import Generic, ItemsView, Iterator, KeysView, Optional, TypeVar, ValuesView
 
 K = TypeVar('K')
 V = TypeVar('V')
 
 
-class MultiMap(Generic[K, V], dict[K, list[V]]):
-    def add(self, key: K, value: V):
-        if (values := self.get(key)) is not None:
-            values.append(value)
-        else:
-            self[key] = [value]
+class MultiMap(Generic[K, V]):
+    # Composition over a dict subclass: the inner dict stays on the C fast
+    # paths, and __slots__ drops the per-instance __dict__.
+    __slots__ = ('_values_by_key',)
+
+    def __init__(self) -> None:
+        self._values_by_key: dict[K, list[V]] = {}
+
+    def add(self, key: K, value: V) -> None:
+        # One C-level probe instead of get + branch + store.
+        self._values_by_key.setdefault(key, []).append(value)
+
+    def get(self, key: K, default: Optional[list[V]] = None) -> Optional[list[V]]:
+        return self._values_by_key.get(key, default)
+
+    def items(self) -> ItemsView[K, list[V]]:
+        return self._values_by_key.items()
+
+    def keys(self) -> KeysView[K]:
+        return self._values_by_key.keys()
+
+    def values(self) -> ValuesView[list[V]]:
+        return self._values_by_key.values()
+
+    def __getitem__(self, key: K) -> list[V]:
+        return self._values_by_key[key]
+
+    def __setitem__(self, key: K, values: list[V]) -> None:
+        self._values_by_key[key] = values
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._values_by_key
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self._values_by_key)
+
+    def __len__(self) -> int:
+        return len(self._values_by_key)
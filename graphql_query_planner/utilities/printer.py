@@ -0,0 +1,256 @@
+from typing import Any, Callable
+
+from graphql import (
+    ArgumentNode,
+    BooleanValueNode,
+    DocumentNode,
+    EnumValueNode,
+    FieldNode,
+    FloatValueNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    InlineFragmentNode,
+    IntValueNode,
+    ListTypeNode,
+    ListValueNode,
+    NamedTypeNode,
+    NameNode,
+    Node,
+    NonNullTypeNode,
+    NullValueNode,
+    ObjectValueNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    StringValueNode,
+    VariableDefinitionNode,
+    VariableNode,
+)
+from graphql.language.block_string import print_block_string
+from graphql.language.print_string import print_string
+
+# Single-pass minified printing of operation documents.
+#
+# compact_print(node) emits the same string as
+# strip_ignored_characters(print_ast(node)), without allocating the
+# intermediate pretty-printed string or re-lexing it: one walk over the AST
+# instead of two plus a lexer pass.
+
+# Two adjacent tokens need a separating space only when the first is a
+# non-punctuator (name, number, string) and the second is a non-punctuator or
+# a `...` spread — the rule strip_ignored_characters applies. Token classes
+# are recognized by their boundary characters: `"` marks string tokens, `-`
+# can start a (negative) number token but never ends one, and `...` is the
+# only token starting with `.`.
+_WORD_END = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_"')
+_WORD_START = _WORD_END | {'-', '.'}
+
+
+def _emit(parts: list[str], token: str) -> None:
+    if parts and parts[-1][-1] in _WORD_END and token[0] in _WORD_START:
+        parts.append(' ')
+    parts.append(token)
+
+
+def _print_document(parts: list[str], node: DocumentNode) -> None:
+    for definition in node.definitions:
+        _PRINTERS[type(definition)](parts, definition)
+
+
+def _print_operation_definition(parts: list[str], node: OperationDefinitionNode) -> None:
+    shorthand = (
+        node.operation.value == 'query'
+        and node.name is None
+        and not node.variable_definitions
+        and not node.directives
+    )
+    if not shorthand:
+        _emit(parts, node.operation.value)
+        if node.name is not None:
+            _emit(parts, node.name.value)
+        if node.variable_definitions:
+            _emit(parts, '(')
+            for variable_definition in node.variable_definitions:
+                _print_variable_definition(parts, variable_definition)
+            _emit(parts, ')')
+        _print_directives(parts, node.directives)
+    _print_selection_set(parts, node.selection_set)
+
+
+def _print_variable_definition(parts: list[str], node: VariableDefinitionNode) -> None:
+    _print_variable(parts, node.variable)
+    _emit(parts, ':')
+    _PRINTERS[type(node.type)](parts, node.type)
+    if node.default_value is not None:
+        _emit(parts, '=')
+        _PRINTERS[type(node.default_value)](parts, node.default_value)
+    _print_directives(parts, node.directives)
+
+
+def _print_selection_set(parts: list[str], node: SelectionSetNode) -> None:
+    _emit(parts, '{')
+    for selection in node.selections:
+        _PRINTERS[type(selection)](parts, selection)
+    _emit(parts, '}')
+
+
+def _print_field(parts: list[str], node: FieldNode) -> None:
+    if node.alias is not None:
+        _emit(parts, node.alias.value)
+        _emit(parts, ':')
+    _emit(parts, node.name.value)
+    if node.arguments:
+        _emit(parts, '(')
+        for argument in node.arguments:
+            _print_argument(parts, argument)
+        _emit(parts, ')')
+    _print_directives(parts, node.directives)
+    if node.selection_set is not None:
+        _print_selection_set(parts, node.selection_set)
+
+
+def _print_argument(parts: list[str], node: ArgumentNode) -> None:
+    _emit(parts, node.name.value)
+    _emit(parts, ':')
+    _PRINTERS[type(node.value)](parts, node.value)
+
+
+def _print_fragment_spread(parts: list[str], node: FragmentSpreadNode) -> None:
+    _emit(parts, '...')
+    _emit(parts, node.name.value)
+    _print_directives(parts, node.directives)
+
+
+def _print_inline_fragment(parts: list[str], node: InlineFragmentNode) -> None:
+    _emit(parts, '...')
+    if node.type_condition is not None:
+        _emit(parts, 'on')
+        _emit(parts, node.type_condition.name.value)
+    _print_directives(parts, node.directives)
+    _print_selection_set(parts, node.selection_set)
+
+
+def _print_fragment_definition(parts: list[str], node: FragmentDefinitionNode) -> None:
+    _emit(parts, 'fragment')
+    _emit(parts, node.name.value)
+    _emit(parts, 'on')
+    _emit(parts, node.type_condition.name.value)
+    _print_directives(parts, node.directives)
+    _print_selection_set(parts, node.selection_set)
+
+
+def _print_directives(parts: list[str], directives) -> None:
+    if directives:
+        for directive in directives:
+            _emit(parts, '@')
+            _emit(parts, directive.name.value)
+            if directive.arguments:
+                _emit(parts, '(')
+                for argument in directive.arguments:
+                    _print_argument(parts, argument)
+                _emit(parts, ')')
+
+
+def _print_variable(parts: list[str], node: VariableNode) -> None:
+    _emit(parts, '$')
+    _emit(parts, node.name.value)
+
+
+def _print_int_value(parts: list[str], node: IntValueNode) -> None:
+    _emit(parts, node.value)
+
+
+def _print_float_value(parts: list[str], node: FloatValueNode) -> None:
+    _emit(parts, node.value)
+
+
+def _print_string_value(parts: list[str], node: StringValueNode) -> None:
+    if node.block:
+        _emit(parts, print_block_string(node.value, minimize=True))
+    else:
+        _emit(parts, print_string(node.value))
+
+
+def _print_boolean_value(parts: list[str], node: BooleanValueNode) -> None:
+    _emit(parts, 'true' if node.value else 'false')
+
+
+def _print_null_value(parts: list[str], node: NullValueNode) -> None:
+    _emit(parts, 'null')
+
+
+def _print_enum_value(parts: list[str], node: EnumValueNode) -> None:
+    _emit(parts, node.value)
+
+
+def _print_list_value(parts: list[str], node: ListValueNode) -> None:
+    _emit(parts, '[')
+    for value in node.values:
+        _PRINTERS[type(value)](parts, value)
+    _emit(parts, ']')
+
+
+def _print_object_value(parts: list[str], node: ObjectValueNode) -> None:
+    _emit(parts, '{')
+    for object_field in node.fields:
+        _emit(parts, object_field.name.value)
+        _emit(parts, ':')
+        _PRINTERS[type(object_field.value)](parts, object_field.value)
+    _emit(parts, '}')
+
+
+def _print_named_type(parts: list[str], node: NamedTypeNode) -> None:
+    _emit(parts, node.name.value)
+
+
+def _print_list_type(parts: list[str], node: ListTypeNode) -> None:
+    _emit(parts, '[')
+    _PRINTERS[type(node.type)](parts, node.type)
+    _emit(parts, ']')
+
+
+def _print_non_null_type(parts: list[str], node: NonNullTypeNode) -> None:
+    _PRINTERS[type(node.type)](parts, node.type)
+    _emit(parts, '!')
+
+
+def _print_name(parts: list[str], node: NameNode) -> None:
+    _emit(parts, node.value)
+
+
+# `Any` for the node parameter: each entry only ever receives the node type
+# it is keyed under, a correlation dict value types cannot express.
+_PRINTERS: 'dict[type, Callable[[list[str], Any], None]]' = {
+    DocumentNode: _print_document,
+    OperationDefinitionNode: _print_operation_definition,
+    VariableDefinitionNode: _print_variable_definition,
+    SelectionSetNode: _print_selection_set,
+    FieldNode: _print_field,
+    ArgumentNode: _print_argument,
+    FragmentSpreadNode: _print_fragment_spread,
+    InlineFragmentNode: _print_inline_fragment,
+    FragmentDefinitionNode: _print_fragment_definition,
+    VariableNode: _print_variable,
+    IntValueNode: _print_int_value,
+    FloatValueNode: _print_float_value,
+    StringValueNode: _print_string_value,
+    BooleanValueNode: _print_boolean_value,
+    NullValueNode: _print_null_value,
+    EnumValueNode: _print_enum_value,
+    ListValueNode: _print_list_value,
+    ObjectValueNode: _print_object_value,
+    NamedTypeNode: _print_named_type,
+    ListTypeNode: _print_list_type,
+    NonNullTypeNode: _print_non_null_type,
+    NameNode: _print_name,
+}
+
+
+def compact_print(node: Node) -> str:
+    """Prints `node` in minified form in a single AST walk.
+
+    Supports the executable-document node kinds the planner emits; schema
+    definition nodes are out of scope.
+    """
+    parts: list[str] = []
+    _PRINTERS[type(node)](parts, node)
+    return ''.join(parts)
@@ -0,0 +1,65 @@
+import unittest
+
+from graphql_query_planner.utilities.lru_cache import LRUCache
+
+
+class CountBoundedTest(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('c', 3)
+        self.assertNotIn('a', cache)
+        self.assertEqual(cache.get('b'), 2)
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_get_refreshes_recency(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+
+    def test_overwrite_does_not_grow(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('a', 2)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get('a'), 2)
+
+
+class ByteBoundedTest(unittest.TestCase):
+    def test_currsize_tracks_entry_sizes(self):
+        cache = LRUCache(10, getsizeof=len)
+        cache.set('a', 'xxx')
+        cache.set('b', 'yyyy')
+        self.assertEqual(cache.currsize, 7)
+
+    def test_evicts_until_within_budget(self):
+        cache = LRUCache(10, getsizeof=len)
+        cache.set('a', 'xxx')
+        cache.set('b', 'yyyy')
+        cache.set('c', 'zzzzzzz')
+        self.assertNotIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.currsize, 7)
+
+    def test_overwrite_replaces_accounted_size(self):
+        cache = LRUCache(10, getsizeof=len)
+        cache.set('a', 'xxxx')
+        cache.set('a', 'xx')
+        self.assertEqual(cache.currsize, 2)
+
+    def test_oversized_entry_is_kept_alone(self):
+        # An entry bigger than the whole budget must not be evicted on
+        # insertion; it would otherwise be rebuilt on every request.
+        cache = LRUCache(5, getsizeof=len)
+        cache.set('big', 'xxxxxxxxxx')
+        self.assertIn('big', cache)
+        self.assertEqual(len(cache), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from graphql import build_schema, parse
+
+from graphql_query_planner import QueryPlanner
+from graphql_query_planner.build_query_plan import BuildQueryPlanOptions, OperationContext
+
+SCHEMA = build_schema(
+    '''
+    type Query { x: X }
+    type X { b: Int c: Int }
+    '''
+)
+
+
+def operation_context(document: str) -> OperationContext:
+    parsed = parse(document)
+    operation = parsed.definitions[0]
+    fragments = {
+        definition.name.value: definition  # type: ignore[union-attr]
+        for definition in parsed.definitions[1:]
+    }
+    return OperationContext(schema=SCHEMA, operation=operation, fragments=fragments)
+
+
+class PlanCacheKeyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.planner = QueryPlanner(SCHEMA)
+
+    def key(self, document, options=None):
+        return self.planner._plan_cache_key(operation_context(document), options)
+
+    def test_same_document_same_key(self):
+        document = 'query Q { x { ...F } } fragment F on X { b }'
+        self.assertEqual(self.key(document), self.key(document))
+
+    def test_fragment_bodies_discriminate(self):
+        # Identical operation text; only the fragment bodies differ. Serving
+        # one plan for both would fetch the wrong fields.
+        key_b = self.key('query Q { x { ...F } } fragment F on X { b }')
+        key_c = self.key('query Q { x { ...F } } fragment F on X { c }')
+        self.assertNotEqual(key_b, key_c)
+
+    def test_fragment_order_does_not_discriminate(self):
+        key_ab = self.key(
+            'query Q { x { ...A ...B } } fragment A on X { b } fragment B on X { c }'
+        )
+        key_ba = self.key(
+            'query Q { x { ...A ...B } } fragment B on X { c } fragment A on X { b }'
+        )
+        self.assertEqual(key_ab, key_ba)
+
+    def test_options_discriminate(self):
+        document = '{ x { b } }'
+        with_document_node = BuildQueryPlanOptions(expose_document_node_in_fetch_node=True)
+        self.assertNotEqual(self.key(document), self.key(document, with_document_node))
+
+    def test_default_options_match_none(self):
+        document = '{ x { b } }'
+        self.assertEqual(self.key(document), self.key(document, BuildQueryPlanOptions()))
+
+    def test_schema_digest_discriminates(self):
+        other_schema = build_schema('type Query { x: X } type X { b: Int c: Int d: Int }')
+        other_planner = QueryPlanner(other_schema)
+        document = '{ x { b } }'
+        self.assertNotEqual(
+            self.key(document),
+            other_planner._plan_cache_key(operation_context(document), None),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
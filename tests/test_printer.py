@@ -0,0 +1,38 @@
+import unittest
+
+from graphql import parse, print_ast
+from graphql.utilities import strip_ignored_characters
+
+from graphql_query_planner.utilities.printer import compact_print
+
+# The reference output compact_print must reproduce byte for byte.
+DOCUMENTS = [
+    '{ a }',
+    '{ a b { c d } }',
+    'query Q { a }',
+    'query Q($id: ID!, $n: Int = 3) { user(id: $id, first: $n) { name } }',
+    'mutation M { create(input: {a: 1, b: "x"}) { id } }',
+    'query { field(arg: -1.5) other(arg: [1, 2, [3]]) }',
+    'query { f(s: "hi", t: "") g(e: SOME_ENUM, n: null, b: true) }',
+    '{ a { ...F } ... on T { b } ... { c } }',
+    'fragment F on T { x y { z } }',
+    'query Q @dir(a: 1) { f @skip(if: true) }',
+    '{ alias: field(arg: "with \\"quotes\\" and \\\\ backslash") }',
+    '{ f(block: """\n  multi\n  line\n""") }',
+    '{ f(a: "x", b: "y") }',
+    'subscription S { events { id } }',
+]
+
+
+class CompactPrintTest(unittest.TestCase):
+    def test_matches_strip_ignored_characters(self):
+        for document in DOCUMENTS:
+            with self.subTest(document=document):
+                node = parse(document)
+                self.assertEqual(
+                    compact_print(node), strip_ignored_characters(print_ast(node))
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()